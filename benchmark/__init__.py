@@ -0,0 +1,16 @@
+#
+# benchmark
+#
+# Synthetic solutions and phase timings of sln2scons
+#
+# Usage (from the sln2scons directory):
+#
+#   python -m benchmark --projects 500 --files 40 --shape diamond -o results.json
+#
+# The results file records the parameters and the time of each phase, run
+# it again with --compare results.json to see the ratios against a previous
+# version.
+#
+
+from benchmark.synthetic import generate, SHAPES
+from benchmark.phases import PHASES, run
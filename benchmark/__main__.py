@@ -0,0 +1,107 @@
+#
+# __main__.py
+#
+# Command line of the benchmark: python -m benchmark --help
+#
+
+import json
+import optparse
+import platform
+import shutil
+import subprocess
+import tempfile
+import time
+from os import path
+
+from benchmark import synthetic, phases
+
+def _revision():
+    """Return the git revision of sln2scons or "" if it's unknown."""
+    try:
+        process = subprocess.Popen(["git", "describe", "--always", "--dirty"],
+                                   cwd=path.dirname(path.dirname(path.abspath(__file__))),
+                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        out, err = process.communicate()
+    except OSError:
+        return ""
+    return out.strip()
+
+def main():
+    parser = optparse.OptionParser(usage="python -m benchmark [options]")
+    parser.add_option("-p", "--projects", type="int", default=200,
+                      help="number of projects (default %default)")
+    parser.add_option("-f", "--files", type="int", default=20,
+                      help="source files per project (default %default)")
+    parser.add_option("-I", "--includes", type="int", default=4,
+                      help="include directories per project (default %default)")
+    parser.add_option("-s", "--shape", type="choice", choices=synthetic.SHAPES, default="diamond",
+                      help="dependency graph: " + ", ".join(synthetic.SHAPES) + " (default %default)")
+    parser.add_option("-w", "--width", type="int", default=4,
+                      help="width of the diamond layers or base libraries of the wide shape (default %default)")
+    parser.add_option("--same-case", action="store_false", dest="mixedCase", default=True,
+                      help="refer to the files with the case they have on disk")
+    parser.add_option("-a", "--all-configurations", action="store_true", default=False,
+                      help="generate Debug and Release instead of Release only")
+    parser.add_option("-r", "--repeat", type="int", default=3,
+                      help="conversions to run, the fastest one is kept (default %default)")
+    parser.add_option("-o", "--output", default="benchmark.json",
+                      help="results file (default %default)")
+    parser.add_option("--compare", metavar="FILE",
+                      help="results of a previous run to compare with")
+    parser.add_option("--keep", metavar="DIR",
+                      help="generate the solution in DIR and leave it there")
+    options, args = parser.parse_args()
+    params = {"projects": options.projects, "files": options.files, "includes": options.includes,
+              "shape": options.shape, "width": options.width, "mixedCase": options.mixedCase,
+              "configurations": options.all_configurations and 2 or 1}
+    configurations = ["Release|Win32"]
+    if options.all_configurations:
+        configurations = []
+    root = options.keep or tempfile.mkdtemp(prefix="sln2scons-bench-")
+    try:
+        start = time.time()
+        synthetic.generate(root, options.projects, options.files, options.includes,
+                           options.mixedCase, options.shape, options.width)
+        generation = time.time() - start
+        best = None
+        for i in range(max(options.repeat, 1)):
+            result = phases.run(root, configurations)
+            if best is None or result["total"] < best["total"]:
+                best = result
+    finally:
+        if not options.keep:
+            shutil.rmtree(root, True)
+    results = {"revision": _revision(), "python": platform.python_version(),
+               "date": time.strftime("%Y-%m-%d %H:%M:%S"), "params": params,
+               "generation": generation, "total": best["total"],
+               "phases": best["phases"], "calls": best["calls"]}
+    file = open(options.output, "w")
+    try:
+        json.dump(results, file, indent=1, sort_keys=True)
+    finally:
+        file.close()
+    previous = None
+    if options.compare:
+        file = open(options.compare)
+        try:
+            previous = json.load(file)
+        finally:
+            file.close()
+        if previous.get("params") != params:
+            print "WARNING!!! " + options.compare + " was run with different parameters"
+    print "%-16s %10s" % ("phase", "seconds") + (previous and "%10s %8s" % ("previous", "ratio") or "")
+    for phase in phases.PHASES + ("total",):
+        if phase == "total":
+            seconds = results["total"]
+            before = previous and previous.get("total")
+        else:
+            seconds = results["phases"][phase]
+            before = previous and previous.get("phases", {}).get(phase)
+        line = "%-16s %10.3f" % (phase, seconds)
+        if before:
+            line += "%10.3f %7.2fx" % (before, seconds / before)
+        print line
+    print "Results written to " + options.output
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+#
+# phases.py
+#
+# Time of each phase of a conversion
+#
+
+import os
+import sys
+import time
+
+from sln2scons import Sln2SCons
+from pathcorrect import CaseCorrect
+
+# phases in the order they run, "path correction" is the time spent in
+# CaseCorrect.correct during all the others
+PHASES = ("sln parse", "vcproj parse", "sort", "recursiveDep", "path correction", "emission")
+
+class _Timer:
+    def __init__(self):
+        self.times = dict([(phase, 0.0) for phase in PHASES])
+        self.calls = dict([(phase, 0) for phase in PHASES])
+
+    def call(self, phase, function, *args):
+        start = time.time()
+        try:
+            return function(*args)
+        finally:
+            self.times[phase] += time.time() - start
+            self.calls[phase] += 1
+
+def _converter(timer):
+    """Return a Sln2SCons subclass recording the time of its phases."""
+    class TimedCaseCorrect(CaseCorrect):
+        depth = 0
+
+        def correct(self, file):
+            # only the outermost call, correct() recurses on the directories
+            if self.depth:
+                return CaseCorrect.correct(self, file)
+            self.depth += 1
+            try:
+                return timer.call("path correction", CaseCorrect.correct, self, file)
+            finally:
+                self.depth -= 1
+
+    class TimedSln2SCons(Sln2SCons):
+        pathCorrect = TimedCaseCorrect
+
+        def _readSolution(self, slnFile):
+            return timer.call("sln parse", Sln2SCons._readSolution, self, slnFile)
+
+        def _loadProject(self, proj, cached=None):
+            return timer.call("vcproj parse", Sln2SCons._loadProject, self, proj, cached)
+
+        def _sortProjects(self, arrproj):
+            return timer.call("sort", Sln2SCons._sortProjects, self, arrproj)
+
+        def _recursiveDep(self, proj, index, graph, dirrepl, librepl):
+            return timer.call("recursiveDep", Sln2SCons._recursiveDep, self, proj, index, graph, dirrepl, librepl)
+
+        def _renderProject(self, proj, deps):
+            return timer.call("emission", Sln2SCons._renderProject, self, proj, deps)
+
+        def _renderSConstruct(self, arrproj, outputPath, graph, bodies={}):
+            return timer.call("emission", Sln2SCons._renderSConstruct, self, arrproj, outputPath, graph, bodies)
+
+        def _writeFile(self, fileName, content):
+            return timer.call("emission", Sln2SCons._writeFile, self, fileName, content)
+
+    return TimedSln2SCons
+
+class _Null:
+    def write(self, text):
+        pass
+
+def run(root, configurations=["Release|Win32"], incremental=False, quiet=True):
+    """Convert the solution generated under 'root' (see synthetic.generate)
+    and return a dictionary with the total time and the time of each
+    phase, in seconds.
+
+    The projects are converted in this process (no worker pool) so that
+    every phase can be timed.
+    """
+    timer = _Timer()
+    converter = _converter(timer)
+    cwd = os.getcwd()
+    stdout = sys.stdout
+    os.chdir(os.path.join(root, "work"))
+    if quiet:
+        sys.stdout = _Null()
+    try:
+        start = time.time()
+        converter("../winnt/bench.sln", [], [], [], "../", 1, incremental, configurations)
+        total = time.time() - start
+    finally:
+        sys.stdout = stdout
+        os.chdir(cwd)
+    return {"total": total, "phases": timer.times, "calls": timer.calls}
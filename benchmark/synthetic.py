@@ -0,0 +1,155 @@
+#
+# synthetic.py
+#
+# Generator of Visual Studio 2005 solutions of any size
+#
+
+import os
+import random
+import string
+from os import path
+
+SHAPES = ("chain", "diamond", "wide")
+
+_VCPROJ = "8BC9CEB8-8B4A-11D0-8D11-00A0C91BC942"
+
+_SOURCE = """\
+#include "%s"
+
+int %s_%d(void)
+{
+    return %d;
+}
+"""
+
+def _guid(index):
+    return "B0000000-0000-0000-0000-%012d" % index
+
+def _dependencies(index, shape, width):
+    """Return the indexes of the projects project 'index' depends on.
+
+    chain -- each project depends on the previous one
+    diamond -- layers of alternatively 1 and 'width' projects, each one
+               depending on every project of the previous layer
+    wide -- the first 'width' projects are base libraries every other
+            project depends on
+    """
+    if shape == "chain":
+        return index and [index - 1] or []
+    if shape == "diamond":
+        layers = []
+        start = 0
+        while start <= index:
+            size = (len(layers) % 2) and width or 1
+            layers.append((start, start + size))
+            start = start + size
+        if len(layers) < 2:
+            return []
+        first, last = layers[-2]
+        return range(first, last)
+    if shape == "wide":
+        if index < width:
+            return []
+        return range(width)
+    raise ValueError("unknown shape: " + shape)
+
+def _mixCase(rand, name):
+    """Return the name with randomly changed case, except the extension
+    (the converter recognizes the sources by their extension)."""
+    name, ext = path.splitext(name)
+    return string.join([rand.choice((c.lower(), c.upper())) for c in name], "") + ext
+
+def generate(root, projects=100, files=20, includes=4, mixedCase=True, shape="diamond",
+             width=4, seed=0):
+    """Write a solution and its projects under 'root' and return the path
+    of the solution file (root/winnt/bench.sln).
+
+    Keyword arguments:
+    projects -- number of projects
+    files -- source files per project (each one with its header)
+    includes -- include directories per project
+    mixedCase -- refer to the files and directories with a case different
+                 from the one on disk, as solutions written on Windows do
+    shape -- dependency graph: "chain", "diamond" or "wide"
+    width -- width of the diamond layers and number of base libraries of
+             the wide shape
+    seed -- seed of the random choices (names case, solution order)
+    """
+    rand = random.Random(seed)
+    def refer(name):
+        if mixedCase:
+            return _mixCase(rand, name)
+        return name
+    os.makedirs(path.join(root, "winnt"))
+    os.makedirs(path.join(root, "work"))
+    for i in range(includes):
+        os.makedirs(path.join(root, "Include", "Dir%d" % i))
+    deps = [_dependencies(i, shape, width) for i in range(projects)]
+    used = set()
+    for dep in deps:
+        used.update(dep)
+    entries = []
+    for i in range(projects):
+        name = "Project%d" % i
+        dir = path.join(root, "Src", "Module%d" % i)
+        os.makedirs(dir)
+        # libraries something depends on, executables otherwise
+        conftype = i in used and "4" or "1"
+        refs = []
+        for k in range(files):
+            header = "Header%d.h" % k
+            open(path.join(dir, "Source%d.cpp" % k), "w").write(_SOURCE % (header, name, k, k))
+            open(path.join(dir, header), "w").write("int %s_%d(void);\n" % (name, k))
+            refs.append('<File RelativePath=".\\%s"/><File RelativePath=".\\%s"/>'
+                        % (refer("Source%d.cpp" % k), refer(header)))
+        incdirs = string.join(["..\\..\\%s\\%s" % (refer("Include"), refer("Dir%d" % ((i + k) % includes)))
+                               for k in range(includes)], ";")
+        if conftype == "4":
+            tool = '<Tool Name="VCLibrarianTool" OutputFile="$(OutDir)\\lib%s.lib"/>' % name.lower()
+        else:
+            tool = ('<Tool Name="VCLinkerTool" OutputFile="$(OutDir)\\%s.exe" '
+                    'AdditionalLibraryDirectories="$(SolutionDir)$(ConfigurationName)"/>' % name)
+        configurations = []
+        for conf in ("Debug", "Release"):
+            configurations.append(
+                '<Configuration Name="%s|Win32" OutputDirectory="$(SolutionDir)$(ConfigurationName)" '
+                'IntermediateDirectory="$(ConfigurationName)" ConfigurationType="%s">\n'
+                '<Tool Name="VCCLCompilerTool" AdditionalIncludeDirectories="%s"/>\n%s\n'
+                '</Configuration>' % (conf, conftype, incdirs, tool))
+        open(path.join(dir, name + ".vcproj"), "w").write(
+            '<?xml version="1.0" encoding="Windows-1252"?>\n'
+            '<VisualStudioProject ProjectType="Visual C++" Version="8.00" Name="%s" ProjectGUID="{%s}">\n'
+            '<Platforms><Platform Name="Win32"/></Platforms>\n'
+            '<Configurations>%s</Configurations>\n'
+            '<Files><Filter Name="Source Files">%s</Filter></Files>\n'
+            '</VisualStudioProject>\n'
+            % (name, _guid(i), string.join(configurations, "\n"), string.join(refs, "\n")))
+        entries.append(i)
+    # solutions list the projects in no particular order
+    rand.shuffle(entries)
+    lines = ["Microsoft Visual Studio Solution File, Format Version 9.00\n", "# Visual Studio 2005\n"]
+    for i in entries:
+        name = "Project%d" % i
+        lines.append('Project("{%s}") = "%s", "..\\%s\\%s\\%s.vcproj", "{%s}"\n'
+                     % (_VCPROJ, name, refer("Src"), refer("Module%d" % i), refer(name), _guid(i)))
+        if deps[i]:
+            lines.append("\tProjectSection(ProjectDependencies) = postProject\n")
+            for dep in deps[i]:
+                lines.append("\t\t{%s} = {%s}\n" % (_guid(dep), _guid(dep)))
+            lines.append("\tEndProjectSection\n")
+        lines.append("EndProject\n")
+    lines.append("Global\n")
+    lines.append("\tGlobalSection(SolutionConfigurationPlatforms) = preSolution\n")
+    lines.append("\t\tDebug|Win32 = Debug|Win32\n")
+    lines.append("\t\tRelease|Win32 = Release|Win32\n")
+    lines.append("\tEndGlobalSection\n")
+    lines.append("\tGlobalSection(ProjectConfigurationPlatforms) = postSolution\n")
+    for i in entries:
+        for conf in ("Debug", "Release"):
+            lines.append("\t\t{%s}.%s|Win32.ActiveCfg = %s|Win32\n" % (_guid(i), conf, conf))
+            lines.append("\t\t{%s}.%s|Win32.Build.0 = %s|Win32\n" % (_guid(i), conf, conf))
+    lines.append("\tEndGlobalSection\n")
+    lines.append("EndGlobal\n")
+    slnFile = path.join(root, "winnt", "bench.sln")
+    open(slnFile, "w").write(string.join(lines, ""))
+    return slnFile
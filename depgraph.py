@@ -0,0 +1,236 @@
+#
+# depgraph.py
+#
+# Dependency graph of the projects found in a Visual Studio solution
+#
+
+from collections import deque
+
+class DependencyGraph:
+    """Index the projects of a solution by GUID and order them by dependency.
+
+    Keyword arguments:
+    projects -- list of projects in solution order, each one with an 'id'
+                and a list of 'dependencies' (GUIDs)
+    """
+    def __init__(self, projects):
+        self.projects = projects
+        self.index = {}
+        # (project, guid) pairs for dependencies not present in the solution
+        self.missing = []
+        # list of projects (in solution order) for each dependency cycle
+        self.cycles = []
+        for proj in projects:
+            key = proj.id.upper()
+            if key in self.index:
+                print "WARNING!!! Duplicated project id: {" + proj.id + "} (" + proj.name + ")"
+                continue
+            self.index[key] = proj
+        # edges go from dependency to dependant, kept in solution order
+        self._position = {}
+        self._edges = {}
+        self._deps = {}
+        for pos, proj in enumerate(projects):
+            self._position[proj] = pos
+            self._edges[proj] = []
+        for proj in projects:
+            deps = []
+            for dep in proj.dependencies:
+                projdep = self.index.get(dep.upper())
+                if projdep is None:
+                    self.missing.append((proj, dep))
+                elif projdep not in deps:
+                    deps.append(projdep)
+            self._deps[proj] = deps
+            for projdep in deps:
+                self._edges[projdep].append(proj)
+
+    def get(self, id):
+        """Return the project with the given GUID or None."""
+        return self.index.get(id.upper())
+
+    def dependencies(self, proj):
+        """Return the direct dependencies of a project, in declaration order,
+        skipping the ones that are not part of the solution.
+
+        """
+        return self._deps[proj]
+
+    def sort(self):
+        """Return the projects ordered so every project comes after all its
+        dependencies (Kahn's algorithm, linear in projects + dependencies).
+
+        Among projects that are ready at the same time the solution order is
+        kept, so the result is deterministic. Projects that take part in (or
+        depend on) a dependency cycle can't be ordered: the cycles are
+        recorded in 'self.cycles' and those projects are appended at the end
+        in solution order.
+
+        """
+        indegree = {}
+        for proj in self.projects:
+            indegree[proj] = len(self._deps[proj])
+        ready = deque([proj for proj in self.projects if indegree[proj] == 0])
+        projsorted = []
+        while ready:
+            proj = ready.popleft()
+            projsorted.append(proj)
+            for dependant in self._edges[proj]:
+                indegree[dependant] -= 1
+                if indegree[dependant] == 0:
+                    ready.append(dependant)
+        if len(projsorted) != len(self.projects):
+            left = [proj for proj in self.projects if indegree[proj] > 0]
+            self.cycles = self._findCycles(left)
+            projsorted.extend(left)
+        return projsorted
+
+    def _findCycles(self, projects):
+        """Return the strongly connected components of the given projects
+        that form a cycle (Tarjan's algorithm, iterative).
+
+        """
+        inset = set(projects)
+        index = {}
+        lowlink = {}
+        stack = []
+        onstack = set()
+        cycles = []
+        counter = 0
+        for root in projects:
+            if root in index:
+                continue
+            work = [(root, iter(self._deps[root]))]
+            index[root] = lowlink[root] = counter
+            counter += 1
+            stack.append(root)
+            onstack.add(root)
+            while work:
+                proj, deps = work[-1]
+                advanced = False
+                for projdep in deps:
+                    if projdep not in inset:
+                        continue
+                    if projdep not in index:
+                        index[projdep] = lowlink[projdep] = counter
+                        counter += 1
+                        stack.append(projdep)
+                        onstack.add(projdep)
+                        work.append((projdep, iter(self._deps[projdep])))
+                        advanced = True
+                        break
+                    if projdep in onstack:
+                        lowlink[proj] = min(lowlink[proj], index[projdep])
+                if advanced:
+                    continue
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[proj])
+                if lowlink[proj] == index[proj]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        onstack.discard(member)
+                        component.append(member)
+                        if member is proj:
+                            break
+                    if len(component) > 1 or proj in self._deps[proj]:
+                        component.sort(key=self._position.get)
+                        cycles.append(component)
+        cycles.sort(key=lambda component: self._position[component[0]])
+        return cycles
+
+    def linkClosure(self, proj):
+        """Return the transitive dependencies of a project in link order:
+        every project comes before all the projects it depends on, and
+        each one appears only once.
+
+        The result is cached on the project ('linkdeps') so shared base
+        projects are expanded only once.
+
+        """
+        if proj.linkdeps is not None:
+            return proj.linkdeps
+        # iterative post-order walk, dependencies are resolved first
+        work = [(proj, iter(self._deps[proj]))]
+        visiting = set([proj])
+        while work:
+            current, deps = work[-1]
+            pushed = False
+            for projdep in deps:
+                if projdep.linkdeps is None and projdep not in visiting:
+                    visiting.add(projdep)
+                    work.append((projdep, iter(self._deps[projdep])))
+                    pushed = True
+                    break
+            if pushed:
+                continue
+            work.pop()
+            visiting.discard(current)
+            # concatenate [dep] + closure(dep) and keep the last occurrence
+            # of each project: that order stays valid for the linker
+            chain = []
+            for projdep in self._deps[current]:
+                chain.append(projdep)
+                if projdep.linkdeps is not None:
+                    chain.extend(projdep.linkdeps)
+            # in a cycle the project is reached again through its
+            # dependencies, it doesn't link with itself
+            current.linkdeps = [projdep for projdep in uniqueLast(chain) if projdep is not current]
+        return proj.linkdeps
+
+def uniqueLast(items):
+    """Remove duplicated items keeping the last occurrence of each one."""
+    seen = set()
+    ret = []
+    for item in reversed(items):
+        if item not in seen:
+            seen.add(item)
+            ret.append(item)
+    ret.reverse()
+    return ret
+
+class _Project(object):
+    def __init__(self, name, dependencies=()):
+        self.id = name
+        self.name = name
+        self.dependencies = list(dependencies)
+        self.linkdeps = None
+
+def _names(projects):
+    return [proj.name for proj in projects]
+
+def _test():
+    # C and D form a cycle, E depends on it, B depends on a missing project
+    a = _Project("A")
+    b = _Project("B", ["A", "Missing"])
+    c = _Project("C", ["D"])
+    d = _Project("D", ["C", "a"])
+    e = _Project("E", ["c", "B"])
+    duplicate = _Project("a")
+    graph = DependencyGraph([e, d, c, b, a, duplicate])
+    # the first one wins
+    assert graph.get("A") is a
+    assert graph.missing == [(b, "Missing")]
+    assert _names(graph.sort()) == ["A", "a", "B", "E", "D", "C"]
+    assert [_names(cycle) for cycle in graph.cycles] == [["D", "C"]]
+    # a diamond: the shared base is linked last and only once
+    base = _Project("Base")
+    left = _Project("Left", ["Base"])
+    right = _Project("Right", ["Base"])
+    top = _Project("Top", ["Left", "Right", "Base"])
+    graph = DependencyGraph([top, right, left, base])
+    assert _names(graph.sort()) == ["Base", "Right", "Left", "Top"]
+    assert _names(graph.linkClosure(top)) == ["Left", "Right", "Base"]
+    assert _names(graph.linkClosure(base)) == []
+    # a cycle: each one links with the other, not with itself
+    app = _Project("App", ["Lib"])
+    lib = _Project("Lib", ["App"])
+    graph = DependencyGraph([app, lib])
+    graph.sort()
+    assert _names(graph.linkClosure(app)) == ["Lib"]
+    assert _names(graph.linkClosure(lib)) == ["App"]
+
+if __name__=='__main__':
+    _test()
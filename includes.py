@@ -0,0 +1,111 @@
+#
+# includes.py
+#
+# Scanner of the #include directives of C and C++ sources
+#
+
+import os
+import re
+from os import path
+from manifest import readFile
+
+_pattern = re.compile(r'^[ \t]*#[ \t]*include[ \t]*([<"])([^<>"\r\n]+)[>"]', re.M)
+
+def directives(content):
+    """Return the #include directives of a source as a list of (quoted,
+    name), quoted being True for "name" and False for <name>."""
+    return [(delimiter == '"', name.strip()) for delimiter, name in _pattern.findall(content)]
+
+class Scanner:
+    """Find the headers a source includes, directly or through other
+    headers, the way the SCons C scanner does: "name" is looked for in the
+    directory of the including file then in the include directories,
+    <name> in the include directories only. Headers which can't be found
+    (system headers) are left out.
+
+    Keyword arguments:
+    incdirs -- include directories, relative to the current directory
+    correct -- function correcting the case of a path (CaseCorrect.correct)
+    parsed -- dictionary file -> directives, may be shared with other
+              scanners
+    """
+    def __init__(self, incdirs, correct, parsed=None):
+        self.incdirs = incdirs
+        self.correct = correct
+        if parsed is None:
+            parsed = {}
+        self.parsed = parsed
+        # file -> headers it includes directly
+        self._direct = {}
+        # file -> mtime of the files read
+        self.mtimes = {}
+
+    def headers(self, fileName):
+        """Return the sorted list of the headers included by the file."""
+        found = set()
+        stack = [fileName]
+        while stack:
+            for header in self._includes(stack.pop()):
+                if header not in found:
+                    found.add(header)
+                    stack.append(header)
+        found.discard(fileName)
+        return sorted(found)
+
+    def _includes(self, fileName):
+        ret = self._direct.get(fileName)
+        if ret is None:
+            ret = []
+            try:
+                self.mtimes[fileName] = os.path.getmtime(fileName)
+            except OSError:
+                pass
+            found = self.parsed.get(fileName)
+            if found is None:
+                content = readFile(fileName)
+                found = content is not None and directives(content) or []
+                self.parsed[fileName] = found
+            dir = path.dirname(fileName)
+            for quoted, name in found:
+                header = self._resolve(name.replace("\\", "/"), quoted and dir)
+                if header is not None:
+                    ret.append(header)
+            self._direct[fileName] = ret
+        return ret
+
+    def _resolve(self, name, dir):
+        dirs = self.incdirs
+        if dir is not False:
+            dirs = [dir] + dirs
+        for incdir in dirs:
+            fileName = self.correct(path.normpath(path.join(incdir, name)))
+            if path.isfile(fileName):
+                return fileName
+        return None
+
+def _test():
+    import shutil
+    import tempfile
+    from pathcorrect import CaseCorrect
+    root = tempfile.mkdtemp()
+    try:
+        os.makedirs(path.join(root, "src"))
+        os.makedirs(path.join(root, "Include"))
+        files = {"src/a.cpp": '#include "a.h"\n  # include <B.H>\n#include <stdio.h>\n',
+                 "src/a.h": '#include "../include/c.h"\n',
+                 "Include/b.h": '#include "a.h"\n#include "b.h"\n',
+                 "Include/a.h": '',
+                 "Include/c.h": '// #include "missing.h"\n'}
+        for name, content in files.items():
+            file = open(path.join(root, name), "w")
+            file.write(content)
+            file.close()
+        scanner = Scanner([path.join(root, "Include")], CaseCorrect().correct)
+        found = [path.relpath(header, root).replace("\\", "/") for header in scanner.headers(path.join(root, "src/a.cpp"))]
+        assert found == ["Include/a.h", "Include/b.h", "Include/c.h", "src/a.h"], found
+        assert len(scanner.mtimes) == 5
+    finally:
+        shutil.rmtree(root)
+
+if __name__=='__main__':
+    _test()
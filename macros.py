@@ -0,0 +1,118 @@
+#
+# macros.py
+#
+# Expansion of Visual Studio $(Name) macros
+#
+
+import os
+import re
+from os import path
+
+_pattern = re.compile(r"\$\(([^()$]+)\)")
+
+class Macros:
+    """Values of the macros of one project configuration.
+
+    All the macros of a string are substituted in a single pass, macro
+    values may reference other macros (a macro referencing itself is left
+    unexpanded) and names that aren't known are looked up in the
+    environment. Expanded strings are memoized.
+
+    Keyword arguments:
+    values -- dictionary macro name -> value
+    environ -- environment variables (default os.environ)
+    """
+    def __init__(self, values, environ=None):
+        self.values = values
+        if environ is None:
+            environ = os.environ
+        self.environ = environ
+        self._cache = {}
+
+    def __getstate__(self):
+        # the memoized strings aren't worth sending to other processes
+        return {'values': self.values, 'environ': None, '_cache': {}}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.environ = os.environ
+
+    def expand(self, text, extra=None):
+        """Return the text with its macros expanded. 'extra' holds values
+        that override the ones of the project (for example the $(Input...)
+        macros of a file, see inputMacros).
+
+        """
+        if "$(" not in text:
+            return text
+        if extra:
+            key = (text, tuple(sorted(extra.items())))
+        else:
+            key = text
+        ret = self._cache.get(key)
+        if ret is None:
+            ret = self._expand(text, extra or {}, ())
+            self._cache[key] = ret
+        return ret
+
+    def _expand(self, text, extra, active):
+        def lookup(match):
+            name = match.group(1)
+            if name in active:
+                return match.group(0)
+            value = extra.get(name)
+            if value is None:
+                value = self.values.get(name)
+            if value is None:
+                value = self.environ.get(name)
+            if value is None:
+                return match.group(0)
+            if "$(" in value:
+                value = self._expand(value, extra, active + (name,))
+            return value
+        return _pattern.sub(lookup, text)
+
+def inputMacros(fileName):
+    """Return the $(Input...) macros of a project file."""
+    fileName = fileName.replace("\\", "/")
+    name, ext = path.splitext(path.basename(fileName))
+    dir = path.dirname(fileName)
+    if dir:
+        dir = dir + "/"
+    return {"InputPath": fileName, "InputDir": dir, "InputName": name,
+            "InputFileName": name + ext, "InputExt": ext}
+
+def targetMacros(target):
+    """Return the $(Target...) macros for the output file of a project."""
+    target = target.replace("\\", "/")
+    name, ext = path.splitext(path.basename(target))
+    dir = path.dirname(target)
+    if dir:
+        dir = dir + "/"
+    return {"TargetPath": target, "TargetDir": dir, "TargetName": name,
+            "TargetFileName": name + ext, "TargetExt": ext}
+
+def _test():
+    macros = Macros({"ProjectName": "App", "OutDir": "$(ConfigurationName)/bin",
+                     "ConfigurationName": "Release", "Open": "$(", "Self": "x$(Self)",
+                     "Ping": "$(Pong)", "Pong": "$(Ping)"}, {"HOME": "/home/user", "OutDir": "env"})
+    assert macros.expand("no macro") == "no macro"
+    # the result of an expansion isn't scanned again
+    assert macros.expand("$(Open)ProjectName)") == "$(ProjectName)"
+    assert macros.expand("$(OutDir)/$(ProjectName).exe") == "Release/bin/App.exe"
+    assert macros.expand("$(Self)") == "x$(Self)"
+    assert macros.expand("$(Ping)") == "$(Ping)"
+    assert macros.expand("$(HOME)/$(Unknown)") == "/home/user/$(Unknown)"
+    extra = inputMacros("src\\main.cpp")
+    assert extra == {"InputPath": "src/main.cpp", "InputDir": "src/", "InputName": "main",
+                     "InputFileName": "main.cpp", "InputExt": ".cpp"}
+    assert macros.expand("$(InputName).h") == "$(InputName).h"
+    assert macros.expand("$(InputName).h", extra) == "main.h"
+    assert macros.expand("$(InputName).h", inputMacros("util.cpp")) == "util.h"
+    assert macros.expand("$(ConfigurationName)", {"ConfigurationName": "Debug"}) == "Debug"
+    assert macros.expand("$(ConfigurationName)") == "Release"
+    assert set(macros._cache) >= set(["$(InputName).h", ("$(InputName).h", tuple(sorted(extra.items())))])
+    assert targetMacros("bin\\App.exe")["TargetDir"] == "bin/"
+
+if __name__=='__main__':
+    _test()
@@ -0,0 +1,125 @@
+#
+# manifest.py
+#
+# Record of the inputs and outputs of a conversion, used to regenerate
+# only the SConscripts whose inputs changed
+#
+
+import hashlib
+import json
+import os
+import tempfile
+
+# bump when the generated scripts change for the same inputs
+VERSION = 11
+
+# mkstemp creates private files, generated files get the usual mode
+_umask = os.umask(0)
+os.umask(_umask)
+
+def digest(data):
+    """Return the md5 of the data (hex string)."""
+    return hashlib.md5(data).hexdigest()
+
+def fileStat(fileName):
+    """Return [size, mtime] of the file or None if it doesn't exist."""
+    try:
+        st = os.stat(fileName)
+    except OSError:
+        return None
+    return [st.st_size, st.st_mtime]
+
+def readFile(fileName):
+    """Return the content of the file or None if it can't be read."""
+    try:
+        file = open(fileName, 'rb')
+        try:
+            return file.read()
+        finally:
+            file.close()
+    except IOError:
+        return None
+
+def writeFile(fileName, content):
+    """Replace the file with the content. The data goes to a temporary file
+    of the same directory which is then renamed, so an interrupted run
+    never leaves a truncated file behind.
+
+    """
+    fd, tmp = tempfile.mkstemp(prefix=os.path.basename(fileName) + ".",
+                               dir=os.path.dirname(fileName) or os.curdir)
+    try:
+        file = os.fdopen(fd, 'wb')
+        try:
+            file.write(content)
+        finally:
+            file.close()
+        os.chmod(tmp, 0666 & ~_umask)
+        if os.name == 'nt' and os.path.exists(fileName):
+            # rename doesn't replace files on Windows
+            os.remove(fileName)
+        os.rename(tmp, fileName)
+    except:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+class Manifest:
+    """Hashes of the solution, the projects and the generated files of the
+    previous conversion.
+
+    Keyword arguments:
+    fileName -- where the manifest is stored, None to keep it in memory
+    context -- hash of everything that affects all the outputs (replacement
+               rules, configuration, paths...), when it changes the previous
+               manifest is discarded
+    """
+    def __init__(self, fileName, context):
+        self.fileName = fileName
+        self.context = context
+        self.sln = ""
+        # project path -> {"input", "stat", "state", "render", "output"}
+        self.projects = {}
+        # generated file -> [digest, size, mtime]
+        self.outputs = {}
+        if fileName is None:
+            return
+        try:
+            file = open(fileName, 'r')
+            try:
+                data = json.load(file)
+            finally:
+                file.close()
+        except (IOError, ValueError):
+            return
+        if data.get("version") != VERSION or data.get("context") != context:
+            return
+        self.sln = data.get("sln", "")
+        self.projects = data.get("projects", {})
+        self.outputs = data.get("outputs", {})
+
+    def project(self, name):
+        """Return the recorded entry of a project or None."""
+        return self.projects.get(name)
+
+    def upToDate(self, fileName):
+        """Return True if the generated file still has the recorded content."""
+        rec = self.outputs.get(fileName)
+        if rec is None:
+            return False
+        st = fileStat(fileName)
+        if st is None:
+            return False
+        if st == rec[1:]:
+            return True
+        content = readFile(fileName)
+        return content is not None and digest(content) == rec[0]
+
+    def recordOutput(self, fileName, content):
+        self.outputs[fileName] = [digest(content)] + (fileStat(fileName) or [0, 0])
+
+    def save(self):
+        if self.fileName is None:
+            return
+        writeFile(self.fileName, json.dumps({"version": VERSION, "context": self.context, "sln": self.sln,
+                                             "projects": self.projects, "outputs": self.outputs}))
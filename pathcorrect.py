@@ -1,58 +1,124 @@
-# PathCorrect.py
-# Released to the public domain by Moshe Zadka, 9.6.2000
-
-import dircache, os, string
-
-class PathCorrect:
-
-        def __init__(self):
-                self._cache = {}
-
-        def correct(self, file):
-                if self._cache.has_key(file):
-                        return self._cache[file]
-                ret = self._correct(file)
-                self._cache[file] = ret
-                return ret
-
-        def _correct(self, file):
-                if os.path.exists(file):
-                        return file
-                dir, file = os.path.split(file)
-                dir = self.correct(dir)
-                if not file:
-                        return dir
-                files = dircache.listdir(dir)
-                if file in files:
-                        return os.path.join(dir, file)
-                file = files[map(self.hash, files).index(self.hash(file))]
-                return os.path.join(dir, file)
-
-        def hash(self, file):
-                raise NotImplementedError("use subclassable")
-
-class CaseCorrect(PathCorrect):
-
-        def hash(self, file):
-                return string.lower(file)
-
-class UnderScoreCorrect(PathCorrect):
-
-        def hash(self, file):
-                return string.replace(file, '_', '')
-
-def _test():
-        def randomly_case(s):
-                import random
-                functions = [string.lower, string.upper]
-                l = []
-                for c in s:
-                        l.append(random.choice(functions)(c))
-                return string.join(l, '')
-        c = CaseCorrect()
-        for file in map(randomly_case,
-                        map(os.path.abspath, dircache.listdir("."))):
-                assert os.path.exists(c.correct(file))
-
-if __name__=='__main__':
-        _test()
+# PathCorrect.py
+# Released to the public domain by Moshe Zadka, 9.6.2000
+
+import os, string
+from collections import OrderedDict
+
+_scandir = getattr(os, 'scandir', None)
+
+class PathCorrect:
+
+        def __init__(self, maxdirs=1024):
+                self._cache = {}
+                # directory -> {hash: real name}, least recently used first
+                self._dirs = OrderedDict()
+                self.maxdirs = maxdirs
+                # paths that couldn't be corrected
+                self.missing = []
+                # (path, candidates) when more than one name has the same hash
+                self.ambiguous = []
+                # directories listed, existence checks, cache hits and misses
+                self.listdirs = 0
+                self.exists = 0
+                self.hits = 0
+                self.misses = 0
+
+        def correct(self, file):
+                if self._cache.has_key(file):
+                        self.hits = self.hits + 1
+                        return self._cache[file]
+                self.misses = self.misses + 1
+                ret = self._correct(file)
+                self._cache[file] = ret
+                return ret
+
+        def invalidate(self, dir=None):
+                """Forget the listing of a directory (all of them if dir is
+                None) and the corrected paths."""
+                self._cache = {}
+                if dir is None:
+                        self._dirs.clear()
+                else:
+                        self._dirs.pop(self.correct(dir), None)
+
+        def prewarm(self, dirs):
+                """Index the given directories ahead of time."""
+                for dir in dirs:
+                        self._index(self.correct(dir))
+
+        def _correct(self, file):
+                if not file:
+                        return file
+                self.exists = self.exists + 1
+                if os.path.exists(file):
+                        return file
+                dir, file = os.path.split(file)
+                dir = self.correct(dir)
+                if not file:
+                        return dir
+                ret = self._index(dir).get(self.hash(file))
+                if ret is None:
+                        self.missing.append(os.path.join(dir, file))
+                        return os.path.join(dir, file)
+                if isinstance(ret, tuple):
+                        print "WARNING!!! Ambiguous path: " + os.path.join(dir, file) + " (" + string.join(ret, ", ") + ")"
+                        self.ambiguous.append((os.path.join(dir, file), ret))
+                        ret = ret[0]
+                return os.path.join(dir, ret)
+
+        def _index(self, dir):
+                index = self._dirs.pop(dir, None)
+                if index is None:
+                        index = {}
+                        for file in self._listdir(dir):
+                                key = self.hash(file)
+                                if not index.has_key(key):
+                                        index[key] = file
+                                elif isinstance(index[key], tuple):
+                                        index[key] = tuple(sorted(index[key] + (file,)))
+                                else:
+                                        index[key] = tuple(sorted((index[key], file)))
+                        while len(self._dirs) >= self.maxdirs:
+                                self._dirs.popitem(last=False)
+                self._dirs[dir] = index
+                return index
+
+        def _listdir(self, dir):
+                self.listdirs = self.listdirs + 1
+                try:
+                        if _scandir:
+                                return [entry.name for entry in _scandir(dir or os.curdir)]
+                        return os.listdir(dir or os.curdir)
+                except OSError:
+                        return []
+
+        def hash(self, file):
+                raise NotImplementedError("use subclassable")
+
+class CaseCorrect(PathCorrect):
+
+        def hash(self, file):
+                return string.lower(file)
+
+class UnderScoreCorrect(PathCorrect):
+
+        def hash(self, file):
+                return string.replace(file, '_', '')
+
+def _test():
+        def randomly_case(s):
+                import random
+                functions = [string.lower, string.upper]
+                l = []
+                for c in s:
+                        l.append(random.choice(functions)(c))
+                return string.join(l, '')
+        c = CaseCorrect()
+        for file in map(randomly_case,
+                        map(os.path.abspath, os.listdir("."))):
+                assert os.path.exists(c.correct(file))
+        missing = os.path.abspath("no such file")
+        assert c.correct(missing) == missing and missing in c.missing
+
+if __name__=='__main__':
+        _test()
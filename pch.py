@@ -0,0 +1,145 @@
+#
+# pch.py
+#
+# Precompiled headers of a project configuration
+#
+# Visual C++ creates the .pch from the file with UsePrecompiledHeader="1"
+# (/Yc) and uses it in the ones with UsePrecompiledHeader="2" (/Yu), the
+# header being PrecompiledHeaderThrough. GCC needs the header itself
+# compiled to <header>.gch and included first in the sources using it.
+#
+
+from os import path
+
+# UsePrecompiledHeader values
+NONE = u"0"
+CREATE = u"1"
+USE = u"2"
+# "Use" in the projects converted from Visual Studio 2003
+USE_2003 = u"3"
+
+_DEFAULT_THROUGH = u"stdafx.h"
+
+class PrecompiledHeader(object):
+    """A header precompiled for the sources of a project."""
+    __slots__ = ('through', 'creator', 'sources', 'language')
+
+    def __init__(self, through):
+        # header name as written in the #include ("stdafx.h")
+        self.through = through
+        # source creating the precompiled header or None
+        self.creator = None
+        # sources using it, creator included
+        self.sources = []
+        # "c" or "c++"
+        self.language = "c++"
+
+def _setting(conf, fileConf, attr):
+    """Return the compiler setting of the file, from its FileConfiguration
+    if it has one, else from the project configuration."""
+    value = fileConf.tool("VCCLCompilerTool").get(attr)
+    if value is None:
+        value = conf.tool("VCCLCompilerTool").get(attr, u"")
+    return value
+
+def precompiledHeaders(vcproj, configuration, sources, expand=None):
+    """Return the precompiled headers of a project configuration, in the
+    order of their first source.
+
+    Keyword arguments:
+    vcproj -- vcproj.VCProject
+    configuration -- project configuration ("Release|Win32")
+    sources -- list of (vcproj.File, source name) of the files to compile
+    expand -- function (text, source name) returning the text with its
+              macros expanded, $(Input...) being the ones of the source
+    """
+    conf = vcproj.configuration(configuration)
+    if conf is None:
+        return []
+    headers = []
+    byThrough = {}
+    for fi, source in sources:
+        fileConf = fi.configurations.get(configuration, conf)
+        use = _setting(conf, fileConf, "UsePrecompiledHeader")
+        if use not in (CREATE, USE, USE_2003):
+            continue
+        through = _setting(conf, fileConf, "PrecompiledHeaderThrough") or _DEFAULT_THROUGH
+        if expand is not None:
+            through = expand(through, source)
+        through = through.replace("\\", "/")
+        header = byThrough.get(through.lower())
+        if header is None:
+            header = PrecompiledHeader(through)
+            byThrough[through.lower()] = header
+            headers.append(header)
+        header.sources.append(source)
+        if use == CREATE and header.creator is None:
+            header.creator = source
+    for header in headers:
+        # the header is compiled as the language of the file creating it
+        first = header.creator or header.sources[0]
+        if path.splitext(first)[1] == ".c":
+            header.language = "c"
+    return headers
+
+def _test():
+    import os
+    import templates
+    import vcproj
+    content = """<?xml version="1.0" encoding="Windows-1252"?>
+<VisualStudioProject ProjectType="Visual C++" Name="Sample">
+  <Configurations>
+    <Configuration Name="Release|Win32" ConfigurationType="1">
+      <Tool Name="VCCLCompilerTool" UsePrecompiledHeader="2" PrecompiledHeaderThrough="StdAfx.h"/>
+    </Configuration>
+  </Configurations>
+  <Files>
+    <File RelativePath=".\\main.cpp"/>
+    <File RelativePath=".\\StdAfx.cpp">
+      <FileConfiguration Name="Release|Win32">
+        <Tool Name="VCCLCompilerTool" UsePrecompiledHeader="1"/>
+      </FileConfiguration>
+    </File>
+    <File RelativePath=".\\plain.c">
+      <FileConfiguration Name="Release|Win32">
+        <Tool Name="VCCLCompilerTool" UsePrecompiledHeader="0"/>
+      </FileConfiguration>
+    </File>
+    <File RelativePath=".\\module.c">
+      <FileConfiguration Name="Release|Win32">
+        <Tool Name="VCCLCompilerTool" UsePrecompiledHeader="1" PrecompiledHeaderThrough="$(InputName).h"/>
+      </FileConfiguration>
+    </File>
+  </Files>
+</VisualStudioProject>
+"""
+    project = vcproj.parseString(content, "sample.vcproj")
+    sources = [(fi, fi.path[2:]) for fi in project.files]
+    def expand(text, source):
+        return text.replace("$(InputName)", os.path.splitext(source)[0])
+    headers = precompiledHeaders(project, "Release|Win32", sources, expand)
+    # main.cpp uses the header StdAfx.cpp creates, plain.c opts out and
+    # module.c overrides the header
+    assert [(header.through, header.creator, header.sources, header.language) for header in headers] == \
+           [("StdAfx.h", "StdAfx.cpp", ["main.cpp", "StdAfx.cpp"], "c++"),
+            ("module.h", "module.c", ["module.c"], "c")]
+    assert precompiledHeaders(project, "Debug|Win32", sources) == []
+    # the sources include the header next to the .gch, wherever the
+    # SConscript is read from
+    class Node:
+        abspath = "/build/release/StdAfx.h.gch"
+    class Environment(dict):
+        def Command(self, target, source, action):
+            return [Node()]
+        def Object(self, source, CCFLAGS):
+            return CCFLAGS
+        def Depends(self, target, dependency):
+            pass
+    code = templates.SCONSCRIPT_PCH.substitute(index=0, through="StdAfx.h", gch="StdAfx.h.gch", header="StdAfx.h",
+                                               command="", object="Object", sources="'main.cpp'")
+    scope = {"e": Environment(CCFLAGS=[])}
+    exec code in scope
+    assert scope["pchobjects0"] == [["-Winvalid-pch", "-include", "/build/release/StdAfx.h"]]
+
+if __name__=='__main__':
+    _test()
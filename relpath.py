@@ -0,0 +1,140 @@
+#
+# relpath.py
+#
+# Memoized computation of relative paths between directories
+#
+
+import string
+from os import path
+
+def _normalize(p):
+    return path.normpath(path.join(p.replace("\\.\\", "").replace("\\", "/"), "")).replace("\\", "/")
+
+class RelativePath:
+    """Compute the path of 'target' relative to 'source', both directories
+    with '/' or '\\' separators.
+
+    The normalized and split form of each source (base) directory is kept,
+    as most calls share a few of them, and the results are memoized. The
+    memo is bounded by two generations of at most 'maxsize' entries: when
+    the current one is full it replaces the previous one, and entries
+    found in the previous generation are moved to the current one, so
+    the paths still in use survive.
+    """
+    def __init__(self, maxsize=65536):
+        self.maxsize = maxsize
+        self._bases = {}
+        self._cache = {}
+        self._previous = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __call__(self, source, target):
+        key = (source, target)
+        ret = self._cache.get(key)
+        if ret is not None:
+            self.hits += 1
+            return ret
+        ret = self._previous.get(key)
+        if ret is None:
+            self.misses += 1
+            ret = self._relative(self._base(source), _normalize(target).split("/"))
+        else:
+            self.hits += 1
+        if len(self._cache) >= self.maxsize:
+            self._previous = self._cache
+            self._cache = {}
+        self._cache[key] = ret
+        return ret
+
+    def clear(self):
+        self._bases = {}
+        self._cache = {}
+        self._previous = {}
+
+    def _base(self, source):
+        su = self._bases.get(source)
+        if su is None:
+            if len(self._bases) >= self.maxsize:
+                self._bases = {}
+            su = _normalize(source).split("/")
+            self._bases[source] = su
+        return su
+
+    def _relative(self, su, tu):
+        # skip the parts which are equal   (['a', 'b'] ['a', 'c'] --> ['c'])
+        common = 0
+        last = min(len(su), len(tu))
+        while common < last and su[common] == tu[common]:
+            common += 1
+        up = len(su) - common
+        rest = tu[common:]
+        if up == 1 and su[-1] == "" and not rest and common > 0:
+            # Special case: (http://foo/a/ http://foo/a -> ../a)
+            up = 2
+            rest = [tu[common - 1]]
+        return path.normpath(string.join([".."] * up + rest, "/"))
+
+def _reference(source, target):
+    """Sln2SCons._relativePath as it was written originally."""
+    source = path.normpath(path.join(source.replace("\\.\\", "").replace("\\", "/"), "")).replace("\\", "/")
+    target = path.normpath(path.join(target.replace("\\.\\", "").replace("\\", "/"), "")).replace("\\", "/")
+    su = source.split("/")
+    tu = target.split("/")
+    su.reverse()
+    tu.reverse()
+    while len(su) > 0 and len(tu) > 0 and su[-1] == tu[-1]:
+        su.pop()
+        last_pop=tu.pop()
+    if len(su) == 1 and su[0] == "" and len(tu) == 0:
+        su.append(last_pop)
+        tu.append(last_pop)
+    tu.reverse()
+    relative_url = []
+    for i in range(len(su)):
+        relative_url.append("..")
+    return path.normpath(string.join(relative_url + tu, "/"))
+
+def _paths():
+    import random
+    rand = random.Random(0)
+    parts = ["a", "b", "B", "..", ".", "", "src", "inc"]
+    prefixes = ["", "/", "//", "./", "..\\", "C:\\", "/tmp/"]
+    seps = ["/", "\\", "\\.\\"]
+    ret = []
+    for i in range(2000):
+        p = rand.choice(prefixes)
+        for j in range(rand.randint(0, 5)):
+            p = p + rand.choice(parts) + rand.choice(seps)
+        if rand.random() < 0.5:
+            p = p.rstrip("/\\")
+        ret.append(p)
+    return ret
+
+def _test():
+    paths = _paths()
+    relative = RelativePath(maxsize=100)
+    for source in paths[:100]:
+        for target in paths:
+            assert relative(source, target) == _reference(source, target), (source, target)
+
+def _benchmark():
+    import time
+    bases = ["/home/build/src/project%d/" % i for i in range(50)]
+    targets = ["/home/build/src/project%d/../include/dir%d" % (i % 50, i) for i in range(200)]
+    calls = [(base, target) for base in bases for target in targets] * 5
+    start = time.time()
+    for source, target in calls:
+        _reference(source, target)
+    reference = time.time() - start
+    relative = RelativePath()
+    start = time.time()
+    for source, target in calls:
+        relative(source, target)
+    cached = time.time() - start
+    print "%d calls: original %.3fs, RelativePath %.3fs (%d hits, %d misses)" % (
+        len(calls), reference, cached, relative.hits, relative.misses)
+
+if __name__=='__main__':
+    _test()
+    _benchmark()
@@ -30,14 +30,39 @@
 #
 
 import array
+import codecs
+import json
+import locale
+import multiprocessing
+import optparse
 import re
 import os
 import string
+import sys
+import time
 from os import path
-from xml.dom.minidom import parseString
 from pathcorrect import CaseCorrect
+from relpath import RelativePath
+from depgraph import DependencyGraph, uniqueLast
+import includes
+import macros
+import pch
+import solution
+import stats
+import templates
+import unity
+import vcproj
+from manifest import Manifest, digest, fileStat, readFile, writeFile
+
+class ConversionError(Exception):
+    """The solution can't be converted with the given options."""
+
+class Project(object):
+    __slots__ = ('id', 'name', 'path', 'abspath', 'intdir', 'outdir', 'outfile',
+                 'implib', 'implibdir', 'conftype', 'addlib', 'incdir',
+                 'dependencies', 'linkdeps', 'libname', 'vcproj', 'configured', 'digest',
+                 'stat', 'variant', 'configuration', 'configs', 'target', 'macros')
 
-class Project:
     def __init__(self):
         self.id = ""
         self.name = ""
@@ -52,7 +77,63 @@ class Project:
         self.addlib = []
         self.incdir = []
         self.dependencies = []
-        self.sorted = False
+        self.linkdeps = None
+        # library name used by the dependant projects
+        self.libname = None
+        # parsed project file (vcproj.VCProject)
+        self.vcproj = None
+        # the project file has the configuration
+        self.configured = False
+        # md5 and [size, mtime] of the project file ("" if not found)
+        self.digest = ""
+        self.stat = None
+        # solution configuration ("Release|Win32") and the project
+        # configuration built for it
+        self.variant = ""
+        self.configuration = ""
+        # one copy of the project for each variant being generated
+        self.configs = []
+        # output file of the configuration, with its macros expanded
+        self.target = ""
+        # macros.Macros of the configuration, built on demand
+        self.macros = None
+
+    def __getstate__(self):
+        # the link closure references other projects, don't send it to
+        # the worker processes
+        state = {}
+        for attr in self.__slots__:
+            if attr != 'linkdeps' and attr != 'libname' and attr != 'macros':
+                state[attr] = getattr(self, attr)
+        return state
+
+    def __setstate__(self, state):
+        self.linkdeps = None
+        self.libname = None
+        self.macros = None
+        for attr, value in state.items():
+            setattr(self, attr, value)
+
+    def copy(self, variant, configuration):
+        """Return a copy of the project to resolve the settings of the
+        given configuration. The parsed project file is shared.
+
+        """
+        proj = Project()
+        for attr in ('id', 'name', 'path', 'abspath', 'dependencies', 'vcproj',
+                     'digest', 'stat'):
+            setattr(proj, attr, getattr(self, attr))
+        proj.variant = variant
+        proj.configuration = configuration
+        return proj
+
+    def update(self, other):
+        """Copy the state of a project loaded by a worker process."""
+        self.__setstate__(other.__getstate__())
+
+# settings resolved by Sln2SCons._loadProject, kept in the manifest
+_STATE = ('configuration', 'outfile', 'intdir', 'outdir', 'conftype', 'implib',
+          'implibdir', 'addlib', 'incdir', 'configured', 'target')
 
 class Folder:
     def __init__(self):
@@ -66,378 +147,1050 @@ class Sln2SCons:
     slnFile -- solution file name
     outputPath -- place where base SConstruct will be created (default current),
                   output and library paths will be relative to this one
+    jobs -- number of worker processes used to read the projects and
+            generate the SConscripts (default 1, everything in this process)
+    incremental -- keep a manifest with the hashes of the inputs and outputs
+                   next to the SConstruct and only regenerate the SConscripts
+                   of the projects that changed since the previous run
+    configurations -- solution configurations to generate (default
+                      Release|Win32), an empty list means all the ones found
+                      in the solution. With more than one, each project gets
+                      a SConscript.<variant> for each of them and the
+                      SConstruct selects one with 'scons variant=<variant>'
+    stats -- stats.Stats filled with the time of each phase and project and
+             with counters (bytes parsed, directories listed, cache hits,
+             lines generated...), with jobs > 1 the counters of the worker
+             processes aren't included
+    tuning -- make the SConstruct use the faster SCons settings: the
+              MD5-timestamp decider, the implicit cache, a single signature
+              database and as many jobs as CPUs unless -j is given
+    cacheDir -- shared build cache (CacheDir) used by the SConstruct, it
+                can be changed with 'scons cachedir=<dir>' (default none)
+    variantDir -- directory, relative to the SConstruct, where the objects
+                  are built instead of the source directories (default
+                  none), each variant and project gets its own subdirectory
+    flat -- write a single SConstruct holding every project instead of a
+            SConscript for each one, SCons then reads the whole build from
+            one file
+    unity -- number of sources compiled together in a unity build (default
+             0, no unity build): the C and C++ sources without per file
+             settings or precompiled header are included by generated
+             <project>_unity<n>.cpp files which are built instead of them
+    streaming -- read and generate the projects one at a time in dependency
+                 order and release their details right after, only a
+                 summary of each project stays in memory (the worker pool
+                 isn't used)
+    batch -- Batch converting several solutions, its path corrections,
+             relative paths, parsed project files and SConscripts are
+             shared with the other solutions (default none)
+    includeDeps -- scan the sources for their #include directives (in the
+                   worker processes) and write the headers of each one in
+                   a <SConscript>.includes.json database, the SConscripts
+                   declare them instead of letting SCons scan the sources,
+                   except the ones changed since
+    watching -- keep the parsed projects and the manifest of the conversion
+                in memory for watch()
     """
-    def __init__(self, slnFile, exlist=[], dirrepl=[], librepl=[], outputPath=''):
-        casedir = CaseCorrect()
-        file = open(casedir.correct(slnFile),"r")
-        arrproj=[]
-        arrfolder=[]
-        # example of pattern #1
-        # Project("{8BC9CEB8-8B4A-11D0-8D11-00A0C91BC942}") = "AASSODDLL", "DevSrc\Drivers30\MW\AASSODDLL\AASSODDLL.vcproj", "{A709D276-7285-40A7-9D4D-9D9B2949EEDA}"
-        pat1 = re.compile(r"""
-         Project                                 # skip Project
-         \(\"\{(?P<type>[0-9a-fA-F\-]*)\}\"\)    # extract type
-         \s*=\s*                                 # skip =
-         \"(?P<name>[\w_\-]*)\"                  # extract name
-         \s*,\s*                                 # skip ,
-         \"(?P<path>[\w:\\/\._\-]*)\"            # extract path
-         \s*,\s*                                 # skip ,
-         \"\{(?P<id>[0-9a-fA-F\-]*)\}\"          # extract id
-         (.*)$                                   # skip the rest
-         """, re.VERBOSE)
-        # example of pattern #2
-        # ProjectSection(ProjectDependencies) = postProject
-        pat2 = re.compile(r"""
-         \s*                                     # skip initial spaces
-         ProjectSection
-         \(ProjectDependencies\)
-         (.*)$
-         """, re.VERBOSE)
-        # example of pattern #3
-        # {B746B5A2-F8F1-4A30-9C72-69348B3DCBEC} = {B746B5A2-F8F1-4A30-9C72-69348B3DCBEC}
-        pat3 = re.compile(r"""
-         \s*                                     # skip initial spaces
-         \{(?P<id1>[0-9a-fA-F\-]*)\}             # extract id1
-         \s*=\s*                                 # skip =
-         \{(?P<id2>[0-9a-fA-F\-]*)\}             # extract id2
-         (.*)$                                   # skip the rest
-         """, re.VERBOSE)
-        # example of pattern #4
-        # EndProjectSection
-        pat4 = re.compile(r"""
-         \s*                                     # skip initial spaces
-         EndProjectSection
-         (.*)$
-         """, re.VERBOSE)
-        # example of pattern #5
-        # EndProject
-        pat5 = re.compile(r"""
-         \s*                                     # skip initial spaces
-         EndProject
-         (.*)$
-         """, re.VERBOSE)
-        proj = None
-        type_project = "8BC9CEB8-8B4A-11D0-8D11-00A0C91BC942"
-        type_folder = "2150E333-8FDC-42A3-9474-1A3956D46DE8"
+    # corrects the case of the paths found in the solution and projects
+    pathCorrect = CaseCorrect
+
+    def __init__(self, slnFile, exlist=[], dirrepl=[], librepl=[], outputPath='', jobs=1, incremental=False,
+                 configurations=["Release|Win32"], stats=None, tuning=False, cacheDir="",
+                 variantDir="", flat=False, unity=0, streaming=False, batch=None,
+                 includeDeps=False, watching=False):
+        self.stats = stats
+        self.tuning = tuning
+        self.cacheDir = cacheDir
+        self.variantDir = variantDir
+        self.flat = flat
+        self.unity = unity
+        self.streaming = streaming
+        self.includeDeps = includeDeps
+        self.outputPath = outputPath
+        self.batch = batch
+        if batch is None:
+            self.casedir = self.pathCorrect()
+            self.relativePath = RelativePath()
+        else:
+            self.casedir = batch.casedir
+            self.relativePath = batch.relativePath
         self.slnDir = ""
         self.absSlnDir = path.join(path.normpath(path.join(os.getcwd(), self.slnDir) + "/"), "")
         self.outSlnDir = path.join(path.normpath(path.join(os.getcwd() + "/" + outputPath, self.slnDir) + "/"), "")
         print "Absolute solution dir: " + self.absSlnDir
-        self.config = "Release"
-        for line in file.readlines():
-            match = pat1.search(line)
-            if match:
-                if type_project == match.group("type"):
-                    proj = Project()
-                    proj.id = match.group("id")
-                    proj.name = match.group("name")
-                    joined = path.join(os.getcwd(), path.join(path.dirname(slnFile),match.group("path")).replace("\\", "/")).replace("\\", "/")
-                    proj.path = self._relativePath(os.getcwd().replace("\\", "/"), joined).replace("\\", "/")
-                    proj.abspath = path.normpath(path.join(os.getcwd(), path.dirname(proj.path))) + "/"
-                elif type_folder == match.group("type"):
-                    folder = Folder()
-                    folder.id = match.group("id")
-                    folder.name = match.group("name")
-                    arrfolder.append(folder)
+        self.jobs = jobs
+        self.slnPath = slnFile
+        self.configurations = configurations
+        self.incremental = incremental
+        self.exlist = exlist
+        self.dirrepl = dirrepl
+        self.librepl = librepl
+        self.manifest = None
+        # project path -> vcproj.VCProject, kept between conversions by watch()
+        self.models = None
+        if watching:
+            self.models = {}
+        # projects of the last conversion
+        self.projects = []
+        self.convert()
+
+    def __getstate__(self):
+        # the worker processes don't need what the other solutions of the
+        # batch left
+        state = self.__dict__.copy()
+        state['batch'] = None
+        return state
+
+    def convert(self):
+        """Convert the solution. With a manifest (incremental or watch())
+        only the SConscripts of the projects that changed since the
+        previous conversion, and of the ones depending on them, are
+        generated again.
+
+        """
+        stats = self.stats
+        outputPath = self.outputPath
+        # the caches may be shared with other conversions
+        counters = self._counters()
+        self._begin("sln parse")
+        arrproj, arrfolder = self._readSolution(self.slnPath)
+        self._end("sln parse")
+        configurations = self.configurations
+        if not configurations:
+            configurations = self.solution.configurations
+        unknown = [conf for conf in configurations if conf not in self.solution.configurations]
+        if unknown:
+            raise ConversionError("Configuration: " + string.join(unknown, ", ") + " not in the solution " +
+                                  self.slnFile + " (" + string.join(self.solution.configurations, ", ") + ")")
+        # (solution configuration, name) of each variant
+        self.variants = [(conf, _variantName(conf)) for conf in configurations]
+        self.context = digest(repr((os.getcwd(), outputPath, self.variants, self.exlist, self.dirrepl,
+                                    self.librepl, self.variantDir, self.flat, self.unity, self.includeDeps)))
+        if self.incremental:
+            if self.manifest is None or self.manifest.context != self.context:
+                self.manifest = Manifest(outputPath + ".sln2scons.json", self.context)
+        elif self.models is not None and (self.manifest is None or self.manifest.context != self.context):
+            # kept in memory for watch()
+            self.manifest = Manifest(None, self.context)
+        if self.manifest:
+            self.manifest.sln = self.solution.digest
+        self.uptodate = 0
+        self.shared = 0
+        # file -> #include directives, the sources may have changed
+        self.directives = {}
+        # project path -> manifest entry
+        entries = {}
+        # (project path, variant name) -> project block of the single SConstruct
+        bodies = {}
+        if self.streaming:
+            graph, arrproj = self._stream(arrproj, entries, bodies)
+        else:
+            graph, arrproj = self._convertAll(arrproj, entries, bodies)
+        # create main SConstruct
+        self._begin("sconstruct")
+        outfile = outputPath + "SConstruct"
+        self._writeFile(outfile, self._renderSConstruct(arrproj, outputPath, graph, bodies))
+        self._end("sconstruct")
+        if self.manifest:
+            if self.uptodate:
+                print "Up to date: " + str(self.uptodate) + " SConscript files"
+            outputs = {}
+            for entry in entries.values():
+                for variant in entry["variants"].values():
+                    for fileName in [variant["output"]] + variant["files"]:
+                        if fileName in self.manifest.outputs:
+                            outputs[fileName] = self.manifest.outputs[fileName]
+            outputs[outfile] = self.manifest.outputs[outfile]
+            self.manifest.outputs = outputs
+            self.manifest.projects = entries
+            self._begin("manifest")
+            self.manifest.save()
+            self._end("manifest")
+        self.projects = arrproj
+        if stats is not None:
+            stats.count("projects", len(arrproj))
+            stats.count("SConscripts up to date", self.uptodate)
+            stats.count("SConscripts shared", self.shared)
+            for name, value in self._counters().items():
+                stats.count(name, value - counters[name])
+
+    def _counters(self):
+        """Return the counters of the path and relative path caches."""
+        casedir = self.casedir
+        return {"listdirs": casedir.listdirs,
+                "path stats": casedir.exists,
+                "path cache hits": casedir.hits,
+                "path cache misses": casedir.misses,
+                "relpath cache hits": self.relativePath.hits,
+                "relpath cache misses": self.relativePath.misses}
+
+    def _convertAll(self, arrproj, entries, bodies):
+        """Read all the projects, then generate all the SConscripts (in
+        the worker pool if there is one). Return the dependency graph and
+        the sorted projects.
+
+        """
+        pool = None
+        if self.jobs > 1:
+            pool = multiprocessing.Pool(self.jobs, _initWorker, (self,))
+        try:
+            # read each project file once and resolve every variant
+            self._begin("vcproj parse")
+            for proj in arrproj:
+                self._sharedModel(proj)
+            loaded = self._map(pool, "_loadProject", [(proj, self._cached(proj)) for proj in arrproj])
+            for proj, result in zip(arrproj, loaded):
+                if result is not proj:
+                    proj.update(result)
+                self._loaded(proj, entries)
+            if self.models is not None:
+                self._keepModels(arrproj)
+            self._end("vcproj parse")
+            # sort by dependency
+            self._begin("sort")
+            graph, arrproj = self._sortProjects(arrproj)
+            self._end("sort")
+            # create output file
+            self._begin("link closure")
+            torender = []
+            # generated for another solution of the batch
+            shared = []
+            for index, (variant, name) in enumerate(self.variants):
+                keys = {}
+                for proj in arrproj:
+                    if self._plan(proj, index, keys, graph, entries):
+                        task = (proj.configs[index], self._recursiveDep(proj, index, graph, self.dirrepl, self.librepl))
+                        result = self._sharedScript(*task)
+                        if result is None:
+                            torender.append(task)
+                        else:
+                            shared.append((task, result))
+            self._end("link closure")
+            self._begin("render")
+            scripts = self._map(pool, "_renderProject", torender)
+            self._end("render")
+        finally:
+            if pool:
+                pool.close()
+                pool.join()
+        self._notFound(arrproj)
+        self._begin("write")
+        for (conf, deps), result in zip(torender, scripts) + shared:
+            self._emit(conf, deps, result, entries, bodies)
+        self._end("write")
+        return graph, arrproj
+
+    def _stream(self, arrproj, entries, bodies):
+        """Read, generate and release the projects one at a time in
+        dependency order, only the summary of the projects used by their
+        dependants (settings of each variant, not the files) stays in
+        memory. Return the dependency graph and the sorted projects.
+
+        """
+        self._begin("sort")
+        graph, arrproj = self._sortProjects(arrproj)
+        self._end("sort")
+        self._begin("stream")
+        keys = [{} for variant in self.variants]
+        for proj in arrproj:
+            # the dependencies were done before, except in cycles: the ones
+            # coming later are read now and released after their own turn
+            for projdep in graph.linkClosure(proj) + [proj]:
+                if not projdep.configs:
+                    self._sharedModel(projdep)
+                    self._call("_loadProject", projdep, self._cached(projdep))
+                    self._loaded(projdep, entries)
+            for index, (variant, name) in enumerate(self.variants):
+                if self._plan(proj, index, keys[index], graph, entries):
+                    conf = proj.configs[index]
+                    deps = self._recursiveDep(proj, index, graph, self.dirrepl, self.librepl)
+                    result = self._sharedScript(conf, deps)
+                    if result is None:
+                        result = self._call("_renderProject", conf, deps)
+                    self._emit(conf, deps, result, entries, bodies)
+            self._release(proj)
+        self._end("stream")
+        self._notFound(arrproj)
+        return graph, arrproj
+
+    def _loaded(self, proj, entries):
+        """Account a project just read."""
+        parsed = proj.vcproj is not None
+        if self.batch is not None and parsed and not self.streaming:
+            model = self.batch.models.get(proj.path)
+            if model is not None and model.digest == proj.vcproj.digest:
+                # read for another solution, the worker processes send copies
+                proj.vcproj = model
+                for conf in proj.configs:
+                    conf.vcproj = model
+                parsed = False
             else:
-                match = pat3.search(line)
-                if match and proj:
-                    proj.dependencies.append(match.group("id1"))
-                else:
-                    match = pat5.search(line)
-                    if match and proj:
-                        arrproj.append(proj)
-                        proj = None
-        file.close()
-        # get output name for each project
+                self.batch.models[proj.path] = proj.vcproj
+        if self.stats is not None and parsed:
+            self.stats.count("projects parsed")
+            self.stats.count("xml bytes parsed", proj.vcproj.size)
+        if self.manifest and proj.digest:
+            entries[proj.path] = {"input": proj.digest, "stat": proj.stat, "variants": {}}
+
+    def _release(self, proj):
+        """Drop the parsed project file and the settings only needed to
+        generate the project's own SConscripts."""
+        for conf in [proj] + proj.configs:
+            conf.vcproj = None
+            conf.macros = None
+            conf.incdir = []
+            conf.addlib = []
+
+    def _plan(self, proj, index, keys, graph, entries):
+        """Return True if the SConscript of the project for the variant
+        must be generated, False if there is none or if it is up to date.
+        'keys' holds the render keys of the projects of the variant done
+        before.
+
+        """
+        name = self.variants[index][1]
+        conf = proj.configs[index]
+        if self.manifest:
+            # the key covers the link names of all the dependencies
+            # through the keys of the direct ones
+            key = [name, conf.digest, conf.name, conf.path, conf.configuration, str(conf.configured),
+                   self._libName(conf, self.dirrepl, self.librepl)]
+            key.extend([keys.get(projdep, "") for projdep in graph.dependencies(proj)])
+            keys[proj] = digest(string.join(key, "\n").encode("utf-8"))
+        if not conf.digest:
+            return False
+        if self.manifest:
+            entry = {"render": keys[proj], "output": None, "files": [],
+                     "state": dict([(attr, getattr(conf, attr)) for attr in _STATE])}
+            # recorded even when not built so that the project isn't
+            # parsed again next time
+            entries[proj.path]["variants"][name] = entry
+        if not conf.configured:
+            return False
+        if self.manifest:
+            cached = self.manifest.project(proj.path)
+            if cached:
+                cached = cached["variants"].get(name)
+            # the single SConstruct needs every project
+            if cached and not self.flat and cached.get("render") == entry["render"] and not cached.get("conflict") and \
+               (cached["output"] is None or self.manifest.upToDate(cached["output"])) and \
+               not [fileName for fileName in cached["files"] if not self.manifest.upToDate(fileName)]:
+                entry["output"] = cached["output"]
+                entry["files"] = cached["files"]
+                self.uptodate += 1
+                if self.batch is not None and cached["output"]:
+                    # the other solutions must agree with it
+                    result = (cached["output"], readFile(cached["output"]), "",
+                              [(fileName, readFile(fileName)) for fileName in cached["files"]])
+                    if not self._shareScript(conf, self._recursiveDep(proj, index, graph, self.dirrepl, self.librepl), result):
+                        entry["conflict"] = True
+                return False
+        return True
+
+    def _emit(self, conf, deps, result, entries, bodies):
+        """Write the files generated for a project (see _renderProject)."""
+        entry = None
+        if self.manifest:
+            entry = entries[conf.path]["variants"][_variantName(conf.variant)]
+        if self.batch is not None and not self.flat and not self._shareScript(conf, deps, result):
+            if entry:
+                # generated again next time to report it
+                entry["conflict"] = True
+            return
+        outfile, content, repl, files = result
+        if content is None:
+            print "Custom script: " + outfile + " (" + repl + ")"
+            return
+        # unity build sources
+        for fileName, data in files:
+            if self._writeFile(fileName, data):
+                print "Creating file: " + fileName
+        if entry:
+            entry["files"] = [fileName for fileName, data in files]
+        if self.flat:
+            bodies[(conf.path, _variantName(conf.variant))] = content
+            return
+        if self._writeFile(outfile, content):
+            print "Creating file: " + outfile
+        if entry:
+            entry["output"] = outfile
+
+    def _sharedModel(self, proj):
+        """Give the project the file parsed for another solution of the
+        batch, _loadProject checks that it is still the same."""
+        if self.batch is not None and proj.vcproj is None:
+            proj.vcproj = self.batch.models.get(proj.path)
+
+    def _scriptKey(self, conf, deps):
+        """Return the digest of what the SConscript of a project
+        configuration is generated from, but the solution."""
+        dir = ""
+        if self.variantDir:
+            dir = self._scriptDir(conf)
+        return digest(repr((conf.digest, conf.name, _variantName(conf.variant), len(self.variants) > 1,
+                            [getattr(conf, attr) for attr in _STATE], deps, self.exlist, self.dirrepl,
+                            self.variantDir, dir, self.unity, self.includeDeps)))
+
+    def _sharedScript(self, conf, deps):
+        """Return the files generated for the project configuration by
+        another solution of the batch (see _renderProject) if it has the
+        same settings there, None otherwise.
+
+        """
+        if self.batch is None or self.flat:
+            return None
+        script = self.batch.scripts.get((conf.path, self._scriptName(_variantName(conf.variant))))
+        if script is None or script["key"] != self._scriptKey(conf, deps):
+            return None
+        self.shared += 1
+        return script["result"]
+
+    def _shareScript(self, conf, deps, result):
+        """Record the files generated for a project configuration in the
+        batch. Return False if another solution generated different ones,
+        which are kept.
+
+        """
+        id = (conf.path, self._scriptName(_variantName(conf.variant)))
+        state = dict([(attr, getattr(conf, attr)) for attr in _STATE])
+        state["libs"] = deps
+        script = self.batch.scripts.get(id)
+        if script is None:
+            self.batch.scripts[id] = {"key": self._scriptKey(conf, deps), "solution": self.slnFile,
+                                      "state": state, "result": result}
+            return True
+        if script["result"] == result:
+            return True
+        differ = [attr for attr in sorted(state) if state[attr] != script["state"].get(attr)]
+        print "WARNING!!! Conflict: " + result[0] + " of " + script["solution"] + " differs for " + \
+              self.slnFile + " (" + (string.join(differ, ", ") or "options") + "), not replaced!!!"
+        self.batch.conflicts.append((result[0], script["solution"], self.slnFile, differ))
+        return False
+
+    def _notFound(self, arrproj):
         for proj in arrproj:
-            # merge path with solution directory
-            vcprojContent = self._getFileContent(casedir.correct(proj.path))
-            vcprojDoc = parseString(vcprojContent)
-            confs = vcprojDoc.documentElement.getElementsByTagName("Configurations")
-            if confs:
-                list = confs[0].getElementsByTagName("Configuration")
-            if len(list) > 0:
-                for elem in list:
-                    if elem.getAttribute("Name") == self.config + "|Win32":
-                        for tool in elem.getElementsByTagName("Tool"):
-                            if tool.getAttribute("Name") == "VCLinkerTool":
-                                proj.outfile, dummyext = path.splitext(path.basename(self._processMacros(tool.getAttribute("OutputFile"), proj, False)))
-                                proj.outfile = proj.outfile.replace("\\", "/")
-            if proj.outfile == "":
-                proj.outfile = proj.name
-        # sort by dependency
-        projsorted = []
+            if not proj.digest:
+                print "WARNING!!! File: " + proj.path + " (" + self.casedir.correct(proj.path) + ") not found!!!"
+
+    def _keepModels(self, arrproj):
+        """Remember the parsed project files, give the ones kept from the
+        previous conversion to the projects restored from the manifest.
+
+        """
+        models = {}
         for proj in arrproj:
-            if len(proj.dependencies) == 0:
-                proj.sorted = True
-                projsorted.append(proj)
-        allsorted = False
-        maxdep = 1
-        toomuch = 0
-        # not very clever sort
-        while not allsorted:
-            foundone = False
-            cntsort = 0
+            model = proj.vcproj
+            if model is None:
+                model = self.models.get(proj.path)
+                if model is None or model.digest != proj.digest:
+                    continue
+                for conf in [proj] + proj.configs:
+                    conf.vcproj = model
+            models[proj.path] = model
+        self.models = models
+
+    def watch(self, interval=1.0):
+        """Convert the solution again each time it or one of its project
+        files changes, until interrupted (Ctrl+C).
+
+        The files are polled with stat every 'interval' seconds. The parsed
+        projects, the corrected paths and the manifest are kept in memory,
+        so an edit only costs the parsing of the changed files and the
+        generation of the affected SConscripts.
+        """
+        if self.models is None:
+            # not created with watching=True, fill the manifest and the
+            # models, unchanged files aren't written
+            self.models = {}
+            self.convert()
+        stats = self._watchedFiles()
+        print "Watching " + str(len(stats)) + " files (Ctrl+C to stop)"
+        try:
+            while True:
+                time.sleep(interval)
+                current = self._watchedFiles()
+                changed = [fileName for fileName in current if current[fileName] != stats.get(fileName)]
+                if not changed:
+                    continue
+                for fileName in changed:
+                    print "Changed: " + fileName
+                    self.casedir.invalidate(path.dirname(fileName))
+                if self.slnFile in changed:
+                    # projects may have been added or moved
+                    self.casedir.invalidate()
+                start = time.time()
+                try:
+                    self.convert()
+                    print "Converted in %.3f s" % (time.time() - start)
+                except ConversionError, e:
+                    print "ERROR!!! " + unicode(e)
+                stats = self._watchedFiles()
+        except KeyboardInterrupt:
+            pass
+
+    def _watchedFiles(self):
+        """Return the solution and project files with their [size, mtime]."""
+        files = {self.slnFile: fileStat(self.slnFile)}
+        for proj in self.projects:
+            fileName = self.casedir.correct(proj.path)
+            files[fileName] = fileStat(fileName)
+        return files
+
+    def _begin(self, phase):
+        if self.stats is not None:
+            self.stats.begin(phase)
+
+    def _end(self, phase):
+        if self.stats is not None:
+            self.stats.end(phase)
+
+    def _readSolution(self, slnFile):
+        """Parse the solution file. Return the lists of projects and
+        folders.
+
+        """
+        arrproj = []
+        arrfolder = []
+        self.slnFile = path.abspath(self.casedir.correct(slnFile)).replace("\\", "/")
+        self.solution = solution.parse(self.slnFile)
+        for entry in self.solution.projects:
+            if entry.type == solution.PROJECT_VCPROJ:
+                proj = Project()
+                proj.id = entry.id
+                proj.name = entry.name
+                joined = path.join(os.getcwd(), path.join(path.dirname(slnFile), entry.path).replace("\\", "/")).replace("\\", "/")
+                proj.path = self._relativePath(os.getcwd().replace("\\", "/"), joined).replace("\\", "/")
+                proj.abspath = path.normpath(path.join(os.getcwd(), path.dirname(proj.path))) + "/"
+                proj.dependencies = entry.dependencies
+                arrproj.append(proj)
+            elif entry.type == solution.PROJECT_FOLDER:
+                folder = Folder()
+                folder.id = entry.id
+                folder.name = entry.name
+                arrfolder.append(folder)
+        return arrproj, arrfolder
+
+    def _sortProjects(self, arrproj):
+        """Return the dependency graph of the projects and the projects
+        sorted by dependency.
+
+        """
+        graph = DependencyGraph(arrproj)
+        arrproj = graph.sort()
+        for proj, dep in graph.missing:
+            print "WARNING!!! Project: " + proj.name + " depends on {" + dep + "} which is not in the solution!!!"
+        for cycle in graph.cycles:
+            print "WARNING!!! Dependency cycle between projects: " + string.join([proj.name for proj in cycle], ", ")
+        return graph, arrproj
+
+    def _renderSConstruct(self, arrproj, outputPath, graph, bodies={}):
+        """Generate the main SConstruct. In flat mode 'bodies' holds the
+        rendered projects: (project path, variant name) -> content.
+
+        """
+        multi = len(self.variants) > 1
+        if multi:
+            names = [name for variant, name in self.variants]
+            default = names[0]
+            if "release" in names:
+                default = "release"
+            outdir = "/' + variant"
+        else:
+            outdir = "/" + self.variants[0][1] + "'"
+        lines = [templates.SCONSTRUCT_HEADER]
+        if self.tuning:
+            lines.append(templates.SCONSTRUCT_TUNING)
+        if self.includeDeps:
+            lines.append(templates.SCONSTRUCT_INCLUDES)
+        if self.cacheDir:
+            lines.append(templates.SCONSTRUCT_CACHEDIR.substitute(cachedir=self.cacheDir.replace("\\", "/")))
+        if multi:
+            lines.append(templates.SCONSTRUCT_VARIANT.substitute(default=default, names=templates.quoted(names)))
+        lines.append(templates.SCONSTRUCT_DIRS.substitute(outdir=outdir))
+        lines.append(templates.SCONSTRUCT_TARGETS)
+        for index, (variant, name) in enumerate(self.variants):
+            indent = ""
+            if multi:
+                if index == 0:
+                    lines.append("if variant == '" + name + "':\n")
+                else:
+                    lines.append("elif variant == '" + name + "':\n")
+                indent = "    "
+            # projects with a generated script, in the targets dictionary
+            built = set()
             for proj in arrproj:
-                if proj.sorted:
-                    cntsort = cntsort + 1
-                if not proj.sorted and len(proj.dependencies) == maxdep:
-                    foundone = True
-                    canadd = 0
-                    # find dependant project
-                    for dep in proj.dependencies:
-                        for projdep in arrproj:
-                            if projdep.id == dep and projdep.sorted:
-                                canadd = canadd + 1
-                    if canadd != maxdep:
-                        # try next
-                        continue
-                    # add it
-                    proj.sorted = True
-                    projsorted.append(proj)
-            if not foundone or toomuch > 1000:
-                toomuch = 0
-                maxdep = maxdep + 1
+                custom, repl = self._customScript(proj)
+                if custom:
+                    if not repl == "":
+                        lines.append(indent + "env.SConscript('" + repl + "')\n")
+                    continue
+                conf = proj.configs[index]
+                if not conf.digest or not conf.configured:
+                    # no SConscript for this variant
+                    continue
+                built.add(proj)
+                if self.flat:
+                    body = bodies.get((proj.path, name))
+                    if body is not None:
+                        lines.extend([line.strip() and indent + line or line for line in body.splitlines(True)])
+                    continue
+                dir = self._scriptDir(proj)
+                args = ""
+                if self.variantDir:
+                    args = ", variant_dir='#" + _buildDir(self.variantDir, name, dir) + "', duplicate=0"
+                lines.append(indent + templates.SCONSTRUCT_SCONSCRIPT.substitute(
+                    name=proj.name, script=dir + "/" + self._scriptName(name), args=args))
+            # order the projects as the solution does
+            for proj in arrproj:
+                deps = [projdep for projdep in graph.dependencies(proj) if projdep in built]
+                if proj in built and deps:
+                    lines.append(indent + templates.SCONSTRUCT_DEPENDS.substitute(
+                        name=proj.name, deps=string.join(["targets['" + projdep.name + "']" for projdep in deps], ", ")))
+        return string.join(lines, "")
+
+    def _customScript(self, proj):
+        """Return (True, replacement script) if the project has a custom
+        script (see exlist), (False, "") otherwise.
+
+        """
+        for out, repl in self.exlist:
+            if out == path.dirname(proj.path) + "/SConscript":
+                return True, repl
+        return False, ""
+
+    def _scriptDir(self, proj):
+        """Return the directory of the project relative to the SConstruct."""
+        return self._relativePath(path.normpath(path.join(os.getcwd(), self.outputPath) + "/"), path.normpath(path.join(os.getcwd(), path.dirname(proj.path)) + "/"))
+
+    def _scriptName(self, name):
+        """Return the SConscript file name for the variant."""
+        if len(self.variants) > 1:
+            return "SConscript." + name
+        return "SConscript"
+
+    def _map(self, pool, method, args):
+        """Call the method for each tuple of arguments, in the worker pool
+        if there is one. Return the list of results.
+
+        """
+        if pool is None:
+            if self.stats is None:
+                return [getattr(self, method)(*arg) for arg in args]
+            results = [self._timed(method, arg) for arg in args]
+        else:
+            chunksize = len(args) / (self.jobs * 4) + 1
+            results = pool.map(_work, [(method, arg) for arg in args], chunksize)
+            if self.stats is None:
+                return results
+        # the first argument is the project
+        for arg, (result, seconds) in zip(args, results):
+            self.stats.project(arg[0].name, method.lstrip("_"), seconds)
+        return [result for result, seconds in results]
+
+    def _call(self, method, *args):
+        """Call the method in this process, its time is accounted to the
+        project (first argument) when collecting stats.
+
+        """
+        if self.stats is None:
+            return getattr(self, method)(*args)
+        result, seconds = self._timed(method, args)
+        self.stats.project(args[0].name, method.lstrip("_"), seconds)
+        return result
+
+    def _timed(self, method, args):
+        """Call the method, return its result and the time it took."""
+        start = time.time()
+        result = getattr(self, method)(*args)
+        return result, time.time() - start
+
+    def _cached(self, proj):
+        """Return the manifest entry of the project, if any."""
+        if self.manifest:
+            return self.manifest.project(proj.path)
+        return None
+
+    def _loadProject(self, proj, cached=None):
+        """Read the project file and resolve the settings of every variant
+        (proj.configs). Return the project.
+
+        When the project file and the configurations the solution maps it
+        to match the manifest entry ('cached') the recorded settings are
+        used and the file isn't parsed.
+
+        """
+        fileName = self.casedir.correct(proj.path)
+        if self.manifest is None:
+            if proj.vcproj is None:
+                proj.vcproj = vcproj.parse(fileName)
+        else:
+            proj.stat = fileStat(fileName)
+            content = None
+            if cached and proj.stat is not None and proj.stat == cached["stat"]:
+                # not touched since the previous run
+                same = True
             else:
-                toomuch = toomuch + 1
-            if cntsort == len(arrproj) or maxdep >= 100:
+                content = readFile(fileName)
+                same = cached is not None and content is not None and digest(content) == cached["input"]
+            for variant, name in self.variants:
+                # the solution may map the project to another configuration
+                if same and (name not in cached["variants"] or
+                             cached["variants"][name]["state"]["configuration"] != self._projectConfiguration(proj, variant)):
+                    if content is None:
+                        content = readFile(fileName)
+                    same = False
+            if same:
+                proj.digest = cached["input"]
+                if proj.vcproj and proj.vcproj.digest != proj.digest:
+                    proj.vcproj = None
+                proj.configs = []
+                for variant, name in self.variants:
+                    conf = proj.copy(variant, "")
+                    for attr, value in cached["variants"][name]["state"].items():
+                        setattr(conf, attr, value)
+                    proj.configs.append(conf)
+                return proj
+            if content is None:
+                proj.vcproj = None
+            elif proj.vcproj is None or proj.vcproj.digest != digest(content):
+                proj.vcproj = vcproj.parseString(content, fileName)
+        if proj.vcproj:
+            proj.digest = proj.vcproj.digest
+        proj.configs = []
+        for variant, name in self.variants:
+            configuration = self._projectConfiguration(proj, variant)
+            conf = proj.copy(variant, configuration)
+            conf.configured = configuration != "" and proj.vcproj is not None and \
+                              proj.vcproj.configuration(configuration) is not None
+            proj.configs.append(self._resolveProject(conf))
+        return proj
+
+    def _projectConfiguration(self, proj, variant):
+        """Return the project configuration ("Release|Win32") built for the
+        solution configuration, "" if the solution doesn't build the
+        project in it.
+
+        """
+        return self.solution.buildConfiguration(proj.id, variant) or ""
+
+    def _resolveProject(self, proj):
+        """Resolve the settings of the project configuration. Return the
+        project.
+
+        """
+        # get output name
+        if proj.vcproj:
+            conf = proj.vcproj.configuration(proj.configuration)
+            if conf and "VCLinkerTool" in conf.tools:
+                proj.outfile, dummyext = path.splitext(path.basename(self._processMacros(conf.tool("VCLinkerTool").get("OutputFile", ""), proj, False)))
+                proj.outfile = proj.outfile.replace("\\", "/")
+        if proj.outfile == "":
+            proj.outfile = proj.name
+        if not proj.vcproj:
+            return proj
+        conf = proj.vcproj.configuration(proj.configuration)
+        if conf:
+            proj.conftype = conf.get("ConfigurationType")
+            proj.intdir = self._relativePath(proj.abspath, self._processMacros(conf.get("IntermediateDirectory"), proj, True))
+            proj.macros = None
+            proj.outdir = self._relativePath(proj.abspath, self._processMacros(conf.get("OutputDirectory"), proj, True)).lower()
+            proj.macros = None
+            # $(Target...) macros
+            for name in ("VCLinkerTool", "VCLibrarianTool"):
+                if conf.tool(name).get("OutputFile"):
+                    proj.target = self._processMacros(conf.tool(name).get("OutputFile"), proj, False).replace("\\", "/")
+                    proj.macros = None
+                    break
+            if "VCCLCompilerTool" in conf.tools:
+                tool = conf.tool("VCCLCompilerTool")
+                proj.incdir = self._processMacros(tool.get("AdditionalIncludeDirectories", ""), proj, True).replace(",", ";").split(";")
+                proj.incdir = [self._relativePath(proj.abspath, path.join(proj.abspath, elem)) for elem in proj.incdir]
+            if "VCLinkerTool" in conf.tools:
+                tool = conf.tool("VCLinkerTool")
+                proj.addlib = self._processMacros(tool.get("AdditionalLibraryDirectories", ""), proj, True).replace(",", ";").split(";")
+                proj.addlib = [self._relativePath(proj.abspath, path.join(proj.abspath, elem)) for elem in proj.addlib]
+                proj.implib = self._processMacros(tool.get("ImportLibrary", ""), proj, True)
+                proj.implib = self._relativePath(proj.abspath, path.join(proj.abspath, proj.implib))
+                proj.implibdir = path.dirname(proj.implib) + "/"
+            if "VCLibrarianTool" in conf.tools and proj.conftype == "4":
+                proj.outfile, dummyext = path.splitext(path.basename(self._processMacros(conf.tool("VCLibrarianTool").get("OutputFile", ""), proj, False)))
+        if proj.outfile == "":
+            proj.outfile = proj.name
+        return proj
+
+    def _renderProject(self, proj, deps):
+        """Generate the SConscript of a project.
+
+        Return a (file name, content, replacement, files) tuple, content is
+        None when there is a custom script for the project and files holds
+        the other files to write, as (file name, content).
+
+        """
+        # create SConscript
+        outfile = path.join(self.casedir.correct(path.dirname(proj.path)), "SConscript").replace("\\", "/")
+        doit = True
+        for elem in self.exlist:
+            out, repl = elem
+            if out == outfile:
+                doit = False
                 break
-        # add unsorted projects (more than 100 dependencies)
-        for proj in arrproj:
-            if not proj.sorted:
-                proj.sorted = True
-                projsorted.append(proj)
-        arrproj = projsorted
-        # create output file
-        for proj in arrproj:
-            # merge path with solution directory
-            vcprojContent = self._getFileContent(casedir.correct(proj.path))
-            if not vcprojContent:
-                print "WARNING!!! File: " + proj.path + " (" + casedir.correct(proj.path) + ") not found!!!"
+        if not doit:
+            return outfile, None, repl, []
+        outfile = path.join(path.dirname(outfile), self._scriptName(_variantName(proj.variant)))
+        if proj.vcproj is None:
+            # settings restored from the manifest
+            proj.vcproj = vcproj.parse(self.casedir.correct(proj.path))
+        # prefix of the sources and targets, and of the include and library
+        # directories, when they aren't relative to the script directory
+        prefix = ""
+        dirprefix = ""
+        if self.flat or self.variantDir:
+            dir = self._scriptDir(proj)
+            if dir != ".":
+                dirprefix = dir + "/"
+            if self.variantDir:
+                # the scripts run in the build directory, look for the
+                # directories from the top
+                dirprefix = "#" + dirprefix
+        if self.flat:
+            lines = [templates.SCONSTRUCT_PROJECT.substitute(name=proj.name, dir=dir)]
+            srcdir = dir
+            if self.variantDir:
+                srcdir = _buildDir(self.variantDir, _variantName(proj.variant), dir)
+                lines.append(templates.SCONSTRUCT_VARIANTDIR.substitute(builddir=srcdir, dir=dir))
+            if srcdir != ".":
+                prefix = srcdir + "/"
+        else:
+            lines = [templates.SCONSCRIPT_HEADER]
+        lines.append(templates.SCONSCRIPT_CLONE)
+        if deps != "":
+            lines.append(templates.SCONSCRIPT_LIBS.substitute(libs=deps))
+        lines.append(templates.SCONSCRIPT_PLATFORM)
+        # library directories
+        if proj.addlib:
+            libpaths = [_prefixed(dirprefix, self._applyDirRepl(self.dirrepl, librarydir.replace("\\", "/"))) for librarydir in proj.addlib]
+            lines.append(templates.SCONSCRIPT_LIBPATH.substitute(libpaths=templates.quoted(libpaths)))
+        # include directories
+        if proj.incdir:
+            incdirs = [_prefixed(dirprefix, self._applyDirRepl(self.dirrepl, include.replace("\\", "/"))) for include in proj.incdir]
+            lines.append(templates.SCONSCRIPT_CPPPATH.substitute(incdirs=templates.quoted(incdirs, "/")))
+        lines.append("\n")
+        # source files
+        files = []
+        sources = []
+        for fi in proj.vcproj.files:
+            filename = path.normpath(fi.path.replace("\\", "/"))
+            if filename.endswith(_SOURCE_EXTENSIONS):
+                sources.append((fi, filename))
+        builder = templates.BUILDERS.get(proj.conftype)
+        if builder:
+            objects = self._renderPrecompiledHeaders(proj, sources, prefix, builder == "SharedLibrary", lines)
+            batches = self._unityBatches(proj, [(fi, filename) for fi, filename in sources if filename not in objects])
+            for aggregate, batch in batches:
+                files.append((path.join(path.dirname(outfile), aggregate), unity.content(proj.name, batch)))
+                for filename in batch:
+                    objects[filename] = None
+            plain = [_prefixed(prefix, filename) for fi, filename in sources if filename not in objects]
+            # the objects lists in the order of their first source
+            names = []
+            for fi, filename in sources:
+                if objects.get(filename) and objects[filename] not in names:
+                    names.append(objects[filename])
+            objects = names
+            if batches:
+                objects.append(templates.quoted([_prefixed(prefix, aggregate) for aggregate, batch in batches]))
+            if plain:
+                objects.append(templates.quoted(plain))
+            lines.append(templates.SCONSCRIPT_TARGET.substitute(name=proj.name, builder=builder, prefix=prefix,
+                                                               sources=string.join(objects, ", ")))
+            if self.includeDeps:
+                database = path.basename(outfile) + ".includes.json"
+                files.append((path.join(path.dirname(outfile), database),
+                              self._includeDatabase(proj, sources, path.dirname(outfile), batches)))
+                if self.flat:
+                    top = path.normpath(path.join(os.getcwd(), self.outputPath))
+                    database = "#" + self._fileRelative(top, path.join(path.dirname(outfile), database))
+                # else relative to the SConscript, which the solutions of a
+                # batch can then share
+                lines.append(templates.SCONSCRIPT_INCLUDES.substitute(name=proj.name, database=database))
+        lines.append(templates.SCONSCRIPT_FOOTER.substitute(name=proj.name, prefix=prefix,
+                                                            outdir=_variantName(proj.variant)))
+        if self.flat:
+            lines.append(templates.SCONSTRUCT_TARGET.substitute(name=proj.name))
+        else:
+            lines.append(templates.SCONSCRIPT_RETURN.substitute(name=proj.name))
+        return outfile, string.join(lines, ""), "", files
+
+    def _renderPrecompiledHeaders(self, proj, sources, prefix, shared, lines):
+        """Append to lines the build of the precompiled headers of the
+        project. Return a dictionary source -> name of the list of objects
+        compiled with its header.
+
+        """
+        def expand(text, source):
+            return self._processMacros(text, proj, False, extra=macros.inputMacros(source))
+        headers = pch.precompiledHeaders(proj.vcproj, proj.configuration, sources, expand)
+        objects = {}
+        gchs = set()
+        for index, header in enumerate(headers):
+            fileName = self._findHeader(proj, header)
+            if fileName is None:
+                print "WARNING!!! Precompiled header: " + header.through + " of project " + proj.name + " not found!!!"
                 continue
-            vcprojDoc = parseString(vcprojContent)
-            confs = vcprojDoc.documentElement.getElementsByTagName("Configurations")
-            if confs:
-                list = confs[0].getElementsByTagName("Configuration")
-            if len(list) > 0:
-                for elem in list:
-                    if elem.getAttribute("Name") == self.config + "|Win32":
-                        proj.conftype = elem.getAttribute("ConfigurationType")
-                        proj.intdir = self._relativePath(proj.abspath, self._processMacros(elem.getAttribute("IntermediateDirectory"), proj, True))
-                        proj.outdir = self._relativePath(proj.abspath, self._processMacros(elem.getAttribute("OutputDirectory"), proj, True)).lower()
-                        for tool in elem.getElementsByTagName("Tool"):
-                            if tool.getAttribute("Name") == "VCCLCompilerTool":
-                                proj.incdir = self._processMacros(tool.getAttribute("AdditionalIncludeDirectories"), proj, True).replace(",", ";").split(";")
-                                proj.incdir = [self._relativePath(proj.abspath, path.join(proj.abspath, elem)) for elem in proj.incdir]
-                            if tool.getAttribute("Name") == "VCLinkerTool":
-                                proj.addlib = self._processMacros(tool.getAttribute("AdditionalLibraryDirectories"), proj, True).replace(",", ";").split(";")
-                                proj.addlib = [self._relativePath(proj.abspath, path.join(proj.abspath, elem)) for elem in proj.addlib]
-                                proj.implib = self._processMacros(tool.getAttribute("ImportLibrary"), proj, True)
-                                proj.implib = self._relativePath(proj.abspath, path.join(proj.abspath, proj.implib))
-                                proj.implibdir = path.dirname(proj.implib) + "/"
-                            if tool.getAttribute("Name") == "VCLibrarianTool":
-                                if proj.conftype == "4":
-                                    proj.outfile, dummyext = path.splitext(path.basename(self._processMacros(tool.getAttribute("OutputFile"), proj, False)))
-                    if proj.outfile == "":
-                        proj.outfile = proj.name
-                    # create SConscript
-                    outfile = path.join(casedir.correct(path.dirname(proj.path)), "SConscript").replace("\\", "/")
-                    doit = True
-                    for elem in exlist:
-                        out, repl = elem
-                        if out == outfile:
-                            doit = False
-                            break
-                    if not doit:
-                        print "Custom script: " + outfile + " (" + repl + ")"
-                        continue
-                    print "Creating file: " + outfile
-                    f = open(outfile, "w+")
-                    # header
-                    f.write("# sln2scons.py autogenerated SConscript\n")
-                    f.write("Import('env')\n")
-                    f.write("e = env.Clone()\n")
-                    deps = self._recursiveDep(proj, arrproj, dirrepl, librepl)
-                    if deps != "":
-                        f.write("e['LIBS'] = [" + deps + "]\n")
-                    f.write("if not e['MYPLATFORM'] == 'winnt':\n")
-                    f.write("    e.Append(LIBS='m')\n")
-                    # library directories
-                    libpaths = ""
-                    for librarydir in proj.addlib:
-                        if libpaths != "":
-                            libpaths += ", "
-                        libpaths += "'" + self._applyDirRepl(dirrepl, librarydir.replace("\\", "/")) + "'"
-                    if libpaths != "":
-                        f.write("e['LIBPATH'] = [" + libpaths + "]\n")
-                    #f.write("env['CPPDEFINES'] = [('i386', '1'), ('LINUX', '1'), ('HAVE_VISIBILITY_HIDDEN_ATTRIBUTE', '1'), ('HAVE_VISIBILITY_PRAGMA', '1'), ('XP_UNIX', '1'), ('_GNU_SOURCE', '1'), ('HAVE_FCNTL_FILE_LOCKING', '1'), ('HAVE_LCHOWN', '1'), ('HAVE_STRERROR', '1'), ('_REENTRANT', '1'), ('HAVE_EXPAT_CONFIG_H', '1')]\n")
-                    # include directories
-                    incdirs = ""
-                    for include in proj.incdir:
-                        if incdirs != "":
-                            incdirs += ", "
-                        incdirs += "'" + self._applyDirRepl(dirrepl, include.replace("\\", "/")) + "/'"
-                    if incdirs != "":
-                        f.write("e['CPPPATH'] = [" + incdirs + "]\n")
-                    f.write("\n")
-                    # read source files
-                    sources = ""
-                    files = vcprojDoc.documentElement.getElementsByTagName("Files")
-                    if files:
-                        filelist = files[0].getElementsByTagName("File")
-                    if len(filelist) > 0:
-                        for fi in filelist:
-                            filename = fi.getAttribute("RelativePath").replace("\\", "/")
-                            filename = path.normpath(filename)
-                            for exten in ".c .C .c++ .cc .cpp .cxx".split(" "):
-                                if filename.endswith(exten):
-                                    if not sources == "":
-                                        sources += ", "
-                                    sources += "'" + filename + "'"
-                                    break
-                    # read header files
-                    headers = ""
-                    if len(filelist) > 0:
-                        for fi in filelist:
-                            filename = fi.getAttribute("RelativePath").replace("\\", "/")
-                            filename = path.normpath(filename)
-                            for exten in ".h .hh .h++ .hm .hpp .hxx".split(" "):
-                                if filename.endswith(exten):
-                                    if not headers == "":
-                                        headers += ", "
-                                    headers += "'" + filename + "'"
-                                    break
-                    if proj.conftype == "1":
-                        # make executable
-                        f.write(proj.name + " = e.Program('" + proj.name + "', [" + sources + "])\n")
-                    elif proj.conftype == "2":
-                        # make shared library
-                        f.write(proj.name + " = e.SharedLibrary('" + proj.name + "', [" + sources + "])\n")
-                    elif proj.conftype == "4":
-                        # make static library
-                        f.write(proj.name + " = e.StaticLibrary('" + proj.name + "', [" + sources + "])\n")
-                        #f.write(proj.name + " = e.StaticLibrary('" + proj.name + "', [" + sources + "])\n")
-                    f.write("e.Default(" + proj.name + ")\n")
-                    f.write("e.Install(Dir('#/' + e['MYPLATFORM'] + '/lib/release'), " + proj.name + ")\n")
-                    f.write("\n")
-                    f.write("if 'distclean' in COMMAND_LINE_TARGETS:\n")
-                    f.write("    Execute(Delete('" + proj.name + "'))\n")
-                    f.write("    Execute(Delete(Dir('#/' + e['MYPLATFORM'] + '/bin/release').abspath + '/' + str(" + proj.name + "[0])))\n")
-                    f.write("    Execute(Delete(Glob('*.o')))\n")
-                    f.write("    Execute(Delete(Glob('*.so')))\n")
-                    f.write("    Execute(Delete(Glob('*.os')))\n")
-                    f.write("    Execute(Delete(Glob('*.a')))\n")
-                    f.write("    Execute(Delete(Glob('*.la')))\n")
-                    f.write("    Execute(Delete(Glob('*.dylib')))\n")
-                    f.write("\n")
-                    f.write("if 'pack' in COMMAND_LINE_TARGETS:\n")
-                    f.write("    Execute(Copy(Dir('#/' + e['MYPLATFORM'] + '/bin/release'), " + proj.name + "[0]))\n")
-                    f.write("    e.Alias('pack', Dir('#/' + e['MYPLATFORM'] + '/bin/release'))\n")
-                    f.write("\n")
-                    f.close()
-        # create main SConstruct
-        outfile = outputPath + "SConstruct"
-        f = open(outfile, "w+")
-        f.write("# sln2scons.py autogenerated SConstruct\n")
-        f.write("import sys\n")
-        f.write("\n")
-        f.write("if ARGUMENTS.get('debug', 0):\n")
-        f.write("    env = Environment(CCFLAGS = '-g')\n")
-        f.write("else:\n")
-        f.write("    env = Environment()\n")
-        f.write("plat = sys.platform\n")
-        f.write("if plat.find('linux') != -1:\n")
-        f.write("    env['MYPLATFORM']='linux'\n")
-        f.write("elif (plat.find('darwin') != -1) or (plat.find('mac') != -1):\n")
-        f.write("    env['MYPLATFORM']='macos'\n")
-        f.write("elif plat.find('win') != -1:\n")
-        f.write("    env['MYPLATFORM']='winnt'\n")
-        f.write("else:\n")
-        f.write("    env['MYPLATFORM']=plat\n")
-        f.write("env['CPPDEFINES'] = [('i386', '1'), ('LINUX', '1'), ('HAVE_VISIBILITY_HIDDEN_ATTRIBUTE', '1'), ('HAVE_VISIBILITY_PRAGMA', '1'), ('XP_UNIX', '1'), ('_GNU_SOURCE', '1'), ('HAVE_FCNTL_FILE_LOCKING', '1'), ('HAVE_LCHOWN', '1'), ('HAVE_STRERROR', '1'), ('_REENTRANT', '1'), ('HAVE_EXPAT_CONFIG_H', '1'), ('USE_APR_UTIL','1')]\n")
-        f.write("Execute(Mkdir(Dir('#' + env['MYPLATFORM'] + '/bin/release')))\n")
-        f.write("Execute(Mkdir(Dir('#' + env['MYPLATFORM'] + '/lib/release')))\n")
-        f.write("Export('env')\n")
-        f.write("\n")
-        # defines
-        #f.write("CPPDEFINES = [('i386', '1'), ('LINUX', '1'), ('HAVE_VISIBILITY_HIDDEN_ATTRIBUTE', '1'), ('HAVE_VISIBILITY_PRAGMA', '1'), ('XP_UNIX', '1'), ('_GNU_SOURCE', '1'), ('HAVE_FCNTL_FILE_LOCKING', '1'), ('HAVE_LCHOWN', '1'), ('HAVE_STRERROR', '1'), ('_REENTRANT', '1'), ('HAVE_EXPAT_CONFIG_H', '1')]")
-        # find dependant project
-        #for proj in arrproj:
-        #    for dep in proj.dependencies:
-        #        for projdep in arrproj:
-        #            if projdep.id == dep:
-        #                f.write("env.Depends('" + proj.name  + "', '" + projdep.name + "')\n")
-        #f.write("env.SConscript([")
-        for proj in arrproj:
-            doit = True
-            for elem in exlist:
-                out, repl = elem
-                if out == path.dirname(proj.path) + "/SConscript":
-                    doit = False
-                    break
-            if doit:
-                f.write("env.SConscript('" + self._relativePath(path.normpath(path.join(os.getcwd(), outputPath) + "/"), path.normpath(path.join(os.getcwd(), path.dirname(proj.path)) + "/")) + "/SConscript')\n")
+            gch = path.basename(fileName) + ".gch"
+            if gch in gchs:
+                gch = "pch" + str(index) + "/" + gch
+            gchs.add(gch)
+            lines.append(templates.SCONSCRIPT_PCH.substitute(
+                index=index, through=header.through, gch=_prefixed(prefix, gch),
+                header=_prefixed(prefix, fileName), command=templates.PCH_COMMANDS[(header.language, shared)],
+                object=shared and "SharedObject" or "Object",
+                sources=templates.quoted([_prefixed(prefix, source) for source in header.sources])))
+            for source in header.sources:
+                objects[source] = "pchobjects" + str(index)
+        if objects:
+            lines.append("\n")
+        return objects
+
+    def _unityBatches(self, proj, sources):
+        """Return the unity build files of the project as a list of (file
+        name, sources included), the sources being a list of (vcproj.File,
+        name). Only the sources without settings of their own are batched,
+        C and C++ separately.
+
+        """
+        if self.unity < 2:
+            return []
+        languages = {".c": [], ".cpp": []}
+        for fi, filename in sources:
+            if proj.configuration in fi.configurations:
+                continue
+            if filename.endswith(".c"):
+                languages[".c"].append(filename)
             else:
-                if not repl == "":
-                    f.write("env.SConscript('" + repl + "')\n")
-        f.close()
+                languages[".cpp"].append(filename)
+        name = proj.name
+        if len(self.variants) > 1:
+            name = name + "_" + _variantName(proj.variant)
+        ret = []
+        for ext in (".c", ".cpp"):
+            for batch in unity.batches(languages[ext], self.unity):
+                if len(batch) > 1:
+                    ret.append((name + "_unity" + str(len(ret)) + ext, batch))
+        return ret
+
+    def _includeDatabase(self, proj, sources, dir, batches):
+        """Return the #include dependency database of the project (JSON):
+        the headers of each source and unity build file (in 'dir'), the
+        unity build files and the time of the newest file read. The paths
+        are relative to 'dir', the directory of the database.
+
+        """
+        projdir = path.dirname(proj.path)
+        incdirs = [path.normpath(path.join(projdir, self._applyDirRepl(self.dirrepl, include.replace("\\", "/"))))
+                   for include in proj.incdir]
+        scanner = includes.Scanner(incdirs, self.casedir.correct, self.directives)
+        absdir = path.abspath(dir)
+        def relative(fileName):
+            return self._fileRelative(absdir, fileName)
+        headers = {}
+        # source -> paths of its headers, relative to the database
+        found = {}
+        for fi, filename in sources:
+            fileName = self.casedir.correct(path.normpath(path.join(projdir, filename)))
+            found[filename] = [relative(fileName)] + [relative(header) for header in scanner.headers(fileName)]
+            headers[found[filename][0]] = found[filename][1:]
+        generated = []
+        for aggregate, batch in batches:
+            name = relative(path.join(dir, aggregate))
+            generated.append(name)
+            headers[name] = sorted(set([header for filename in batch for header in found[filename]]))
+        return json.dumps({"time": max(scanner.mtimes.values() or [0]), "headers": headers,
+                           "generated": generated}, indent=1, sort_keys=True, separators=(",", ": ")) + "\n"
+
+    def _fileRelative(self, dir, fileName):
+        """Return the path of the file relative to the absolute directory."""
+        reldir = self._relativePath(dir + "/", path.dirname(path.abspath(fileName)) + "/")
+        return path.normpath(path.join(reldir, path.basename(fileName))).replace("\\", "/")
+
+    def _findHeader(self, proj, header):
+        """Return the path, relative to the project directory, of the header
+        to precompile or None if it can't be found. It is looked for in
+        the directory of the source creating the precompiled header, the
+        project directory and the include directories.
+
+        """
+        dirs = [""] + proj.incdir
+        if header.creator:
+            dirs.insert(0, path.dirname(header.creator))
+        projdir = path.dirname(proj.path)
+        for dir in dirs:
+            fileName = self.casedir.correct(path.normpath(path.join(projdir, dir.replace("\\", "/"), header.through)))
+            if path.isfile(fileName):
+                reldir = self._relativePath(proj.abspath, path.dirname(path.abspath(fileName)) + "/")
+                return path.normpath(path.join(reldir, path.basename(fileName))).replace("\\", "/")
+        return None
 
-    def _processMacros(self, str, proj, useabs, useout = False):
+    def _writeFile(self, fileName, content):
+        """Write the file unless it already has the same content. Return
+        True if the file was written.
+
+        """
+        if isinstance(content, unicode):
+            content = content.encode("utf-8")
+        if readFile(fileName) != content:
+            writeFile(fileName, content)
+            written = True
+        else:
+            written = False
+        if self.stats is not None:
+            self.stats.count(written and "files written" or "files unchanged")
+            self.stats.count("lines generated", content.count("\n"))
+        if self.manifest:
+            self.manifest.recordOutput(fileName, content)
+        return written
+
+    def _processMacros(self, str, proj, useabs, useout = False, extra=None):
         slndir = self.slnDir
         if useabs:
             slndir = self.absSlnDir
         if useout:
             slndir = self.outSlnDir
-        ret = str.replace(
-              "$(SolutionDir)", slndir).replace(
-              "$(ConfigurationName)", self.config.lower()).replace(
-              "&quot;", "\"")
-        if proj:
-            ret = ret.replace("$(ProjectName)", proj.name)
-            if proj.intdir != "":
-                ret = ret.replace("$(IntDir)", proj.intdir)
-            if proj.outdir != "":
-                ret = ret.replace("$(OutDir)", proj.outdir)
+        values = {"SolutionDir": slndir}
+        if extra:
+            # $(Input...) macros of a file
+            values.update(extra)
+        ret = self._macros(proj).expand(str.replace("&quot;", "\""), values)
         ret = ret.replace("\"", "")
         return ret
 
-    def _getFileContent(self, fileName):
-        """Try to open the file and return its contents. In case of error
-        return None.
-        
-        Return the content of the file
-        
-        """
-        try:
-            file = open(fileName, 'rb')
-            content = file.read()
-            file.close()
-        except:
-            return None
-        return content;
+    def _macros(self, proj):
+        """Return the macros of the project configuration."""
+        if proj.macros is None:
+            configuration, sep, platform = proj.configuration.partition("|")
+            slnname, slnext = path.splitext(path.basename(self.slnFile))
+            values = {"ConfigurationName": configuration.lower(),
+                      "PlatformName": platform,
+                      "ProjectName": proj.name,
+                      "ProjectDir": proj.abspath,
+                      "ProjectPath": proj.abspath + path.basename(proj.path),
+                      "ProjectFileName": path.basename(proj.path),
+                      "ProjectExt": path.splitext(proj.path)[1],
+                      "SolutionName": slnname,
+                      "SolutionFileName": slnname + slnext,
+                      "SolutionExt": slnext,
+                      "SolutionPath": self.slnFile}
+            if proj.intdir != "":
+                values["IntDir"] = proj.intdir
+            if proj.outdir != "":
+                values["OutDir"] = proj.outdir
+            if proj.target != "" and "$(" not in proj.target:
+                values.update(macros.targetMacros(proj.target))
+            proj.macros = macros.Macros(values)
+        return proj.macros
 
     def _relativePath(self, source, target):
-        source = path.normpath(path.join(source.replace("\\.\\", "").replace("\\", "/"), "")).replace("\\", "/")
-        target = path.normpath(path.join(target.replace("\\.\\", "").replace("\\", "/"), "")).replace("\\", "/")
-        su = source.split("/")
-        tu = target.split("/")
-        su.reverse()
-        tu.reverse()
-        #remove parts which are equal   (['a', 'b'] ['a', 'c'] --> ['c'])
-        while len(su) > 0 and len(tu) > 0 and su[-1] == tu[-1]:
-            su.pop()
-            last_pop=tu.pop()
-        if len(su) == 1 and su[0] == "" and len(tu) == 0:
-            #Special case: (http://foo/a/ http://foo/a -> ../a)
-            su.append(last_pop)
-            tu.append(last_pop)
-        tu.reverse()
-        relative_url = []
-        for i in range(len(su)):
-            relative_url.append("..")
-        rel_url = path.normpath(string.join(relative_url + tu, "/"))
-        return rel_url
+        return self.relativePath(source, target)
 
     def _applyDirRepl(self, dirrepl, string):
         for rule in dirrepl:
@@ -451,22 +1204,206 @@ class Sln2SCons:
             string = string.replace(fr, to)
         return string
 
-    def _recursiveDep(self, proj, arrproj, dirrepl, librepl):
-        # find dependant project
-        depstr = ""
-        for dep in proj.dependencies:
-            for projdep in arrproj:
-                if projdep.id == dep and projdep.outfile != "":
-                    deptarget = path.basename(self._processMacros(projdep.outfile, projdep, False))
-                    depstr = depstr + "'" + self._applyLibRepl(librepl, self._applyDirRepl(dirrepl, deptarget)) + "', " + self._recursiveDep(projdep, arrproj, dirrepl, librepl)
-        return depstr
+    def _libName(self, proj, dirrepl, librepl):
+        """Return the library name used to link with the project."""
+        if proj.libname is None:
+            proj.libname = ""
+            if proj.outfile != "":
+                deptarget = path.basename(self._processMacros(proj.outfile, proj, False))
+                proj.libname = self._applyLibRepl(librepl, self._applyDirRepl(dirrepl, deptarget))
+        return proj.libname
+
+    def _recursiveDep(self, proj, index, graph, dirrepl, librepl):
+        # libraries of all the dependant projects, in link order
+        libs = []
+        for projdep in graph.linkClosure(proj):
+            if self._libName(projdep.configs[index], dirrepl, librepl) != "":
+                libs.append(projdep.configs[index].libname)
+        return string.join(["'" + lib + "', " for lib in uniqueLast(libs)], "")
+
+class Batch:
+    """Convert several solutions in one process.
+
+    The path corrections, the relative paths and the parsed project files
+    are shared by the conversions. The SConscript of a project found in
+    several solutions is generated once, when a solution would generate a
+    different one (other configuration mapping, dependencies or options)
+    the conflict is reported and the first one is kept. The macros depend
+    on the solution ($(SolutionDir)...) and aren't shared.
+
+    Keyword arguments:
+    solutions -- list of (solution file name, output path), each solution
+                 gets its own SConstruct and the output paths must differ
+    the others are the ones of Sln2SCons, used for every solution
+    """
+    def __init__(self, solutions, exlist=[], dirrepl=[], librepl=[], jobs=1, incremental=False,
+                 configurations=["Release|Win32"], stats=None, tuning=False, cacheDir="",
+                 variantDir="", flat=False, unity=0, streaming=False, includeDeps=False):
+        self.casedir = Sln2SCons.pathCorrect()
+        self.relativePath = RelativePath()
+        # project path -> vcproj.VCProject
+        self.models = {}
+        # (project path, SConscript name) -> {"key", "solution", "state", "result"}
+        self.scripts = {}
+        # (SConscript, first solution, other solution, settings that differ)
+        self.conflicts = []
+        # Sln2SCons of each solution
+        self.converters = []
+        outputs = {}
+        for slnFile, outputPath in solutions:
+            outfile = path.normpath(path.join(os.getcwd(), outputPath, "SConstruct"))
+            if outfile in outputs:
+                print "WARNING!!! Solution: " + slnFile + " has the same output path as " + outputs[outfile] + ", skipped!!!"
+                self.conflicts.append((outfile, outputs[outfile], slnFile, []))
+                continue
+            outputs[outfile] = slnFile
+            self.converters.append(Sln2SCons(slnFile, exlist=exlist, dirrepl=dirrepl, librepl=librepl,
+                                             outputPath=outputPath, jobs=jobs, incremental=incremental,
+                                             configurations=configurations, stats=stats, tuning=tuning,
+                                             cacheDir=cacheDir, variantDir=variantDir, flat=flat, unity=unity,
+                                             streaming=streaming, batch=self, includeDeps=includeDeps))
+        shared = sum([converter.shared for converter in self.converters])
+        print "Converted " + str(len(self.converters)) + " solutions, " + str(len(self.models)) + \
+              " parsed project files, " + str(shared) + " shared SConscript files, " + str(len(self.conflicts)) + " conflicts"
+
+_SOURCE_EXTENSIONS = (".c", ".C", ".c++", ".cc", ".cpp", ".cxx")
+
+def _prefixed(prefix, fileName):
+    """Return the path of a file relative to a project directory as seen
+    from the directory 'prefix' is relative to."""
+    if not prefix or fileName.startswith(("/", "#")) or fileName[1:2] == ":":
+        return fileName
+    if prefix.startswith("#"):
+        return "#" + _prefixed(prefix[1:], fileName)
+    return path.normpath(prefix + fileName).replace("\\", "/")
+
+def _buildDir(variantDir, name, dir):
+    """Return the directory where a project is built with variantDir."""
+    # keep the projects outside of the SConstruct directory under the variant dir
+    parts = [part == ".." and "_" or part for part in dir.split("/")]
+    return path.normpath(path.join(variantDir, name, *parts)).replace("\\", "/")
+
+def _variantName(configuration):
+    """Return the name used for the files of a solution configuration:
+    "Release|Win32" -> "release", "Release|x64" -> "release_x64"."""
+    conf, sep, platform = configuration.partition("|")
+    name = conf.lower()
+    if platform and platform != "Win32":
+        name = name + "_" + platform.lower()
+    return re.sub(r"[^\w]", "_", name)
+
+# state of the worker processes
+_converter = None
+
+def _initWorker(converter):
+    global _converter
+    _converter = converter
+
+def _work(task):
+    method, args = task
+    if _converter.stats is not None:
+        return _converter._timed(method, args)
+    return getattr(_converter, method)(*args)
 
 if __name__ == '__main__':
+    parser = optparse.OptionParser(usage="%prog [options] [solution [outputPath]]")
+    parser.add_option("-j", "--jobs", type="int", default=1,
+                      help="number of worker processes (default %default)")
+    parser.add_option("-c", "--configuration", action="append", dest="configurations",
+                      metavar="CONFIG", help="solution configuration to generate "
+                      "(\"Release|Win32\" if not given, may be repeated)")
+    parser.add_option("-a", "--all-configurations", action="store_const", const=[],
+                      dest="configurations", help="generate every configuration of the solution")
+    parser.add_option("-i", "--incremental", action="store_true", default=False,
+                      help="only regenerate the SConscripts of changed projects")
+    parser.add_option("-t", "--tune", action="store_true", default=False,
+                      help="generate a SConstruct with the faster SCons settings (MD5-timestamp "
+                      "decider, implicit cache, one signature database, a job per CPU)")
+    parser.add_option("--cache-dir", metavar="DIR", default="",
+                      help="shared build cache directory (CacheDir) of the SConstruct")
+    parser.add_option("--variant-dir", metavar="DIR", default="",
+                      help="build the objects under DIR/<variant>/ instead of the source directories")
+    parser.add_option("-1", "--single-file", action="store_true", dest="flat", default=False,
+                      help="write every project in the SConstruct instead of a SConscript for each one")
+    parser.add_option("-u", "--unity", type="int", default=0, metavar="N",
+                      help="unity build: compile the sources of each project N at a time")
+    parser.add_option("-s", "--streaming", action="store_true", default=False,
+                      help="convert the projects one at a time to bound the memory used")
+    parser.add_option("-d", "--include-deps", action="store_true", default=False,
+                      help="scan the #include directives of the sources and let SCons read "
+                      "the headers from the generated databases instead of scanning")
+    parser.add_option("-b", "--batch", metavar="FILE",
+                      help="convert the solutions listed in FILE, one 'solution [outputPath]' per "
+                      "line (default output path: the directory of the solution)")
+    parser.add_option("-w", "--watch", action="store_true", default=False,
+                      help="keep running and convert again when the solution or a project changes")
+    parser.add_option("--interval", type="float", default=1.0, metavar="SECONDS",
+                      help="time between two checks of the files in watch mode (default %default)")
+    parser.add_option("--stats", metavar="FILE",
+                      help="write the timings and counters of the conversion to FILE (JSON) "
+                      "and print a summary")
+    parser.add_option("--top", type="int", default=10,
+                      help="number of projects in the summary of --stats (default %default)")
+    parser.add_option("--profile", metavar="FILE",
+                      help="run the conversion under cProfile and dump the profile to FILE")
+    options, args = parser.parse_args()
+    if sys.stdout.encoding is None:
+        # project names and paths are unicode, don't fail when the output
+        # is redirected
+        sys.stdout = codecs.getwriter(locale.getpreferredencoding() or "utf-8")(sys.stdout, "replace")
+    if options.batch and (args or options.watch):
+        parser.error("--batch doesn't take a solution and can't be used with --watch")
+    slnFile = "../winnt/test.sln"
+    outputPath = "../"
+    if len(args) > 0:
+        slnFile = args[0]
+    if len(args) > 1:
+        outputPath = args[1]
     # custom scripts
     exlist = []
     # special directory replacement rules
     dirrepl = []
     # special library name replacement rules (when win library name doesn't match OS's library name)
     librepl = []
-    Sln2SCons("../winnt/test.sln", exlist, dirrepl, librepl, "../")
+    if options.configurations is None:
+        options.configurations = ["Release|Win32"]
+    report = None
+    if options.stats:
+        report = stats.Stats()
+    kwargs = {"exlist": exlist, "dirrepl": dirrepl, "librepl": librepl, "jobs": options.jobs,
+              "incremental": options.incremental, "configurations": options.configurations,
+              "stats": report, "tuning": options.tune, "cacheDir": options.cache_dir,
+              "variantDir": options.variant_dir, "flat": options.flat, "unity": options.unity,
+              "streaming": options.streaming, "includeDeps": options.include_deps}
+    if options.watch:
+        kwargs["watching"] = True
+    if options.batch:
+        solutions = []
+        for line in open(options.batch):
+            words = line.split()
+            if not words or words[0].startswith("#"):
+                continue
+            if len(words) > 1:
+                solutions.append((words[0], words[1]))
+            else:
+                solutions.append((words[0], path.join(path.dirname(words[0]), "")))
+        function = Batch
+        args = (solutions,)
+    else:
+        function = Sln2SCons
+        args = (slnFile,)
+        kwargs["outputPath"] = outputPath
+    try:
+        if options.profile:
+            converter = stats.profile(options.profile, function, *args, **kwargs)
+        else:
+            converter = function(*args, **kwargs)
+    except ConversionError, e:
+        print "ERROR!!! " + unicode(e)
+        sys.exit(1)
+    if report:
+        report.save(options.stats)
+        print report.summary(options.top)
+    if options.watch:
+        converter.watch(options.interval)
 
@@ -0,0 +1,268 @@
+#
+# solution.py
+#
+# Streaming reader of Visual Studio 2005 solution files (.sln)
+#
+# The file is read line by line (or through mmap) and each line is
+# dispatched on its leading keyword, no regular expressions involved.
+#
+
+import codecs
+import hashlib
+import mmap
+
+# project type GUIDs
+PROJECT_VCPROJ = "8BC9CEB8-8B4A-11D0-8D11-00A0C91BC942"
+PROJECT_FOLDER = "2150E333-8FDC-42A3-9474-1A3956D46DE8"
+
+class SolutionProject(object):
+    """A Project entry of the solution (projects and solution folders)."""
+    __slots__ = ('type', 'name', 'path', 'id', 'dependencies', 'sections')
+
+    def __init__(self, type, name, path, id):
+        self.type = type
+        self.name = name
+        self.path = path
+        self.id = id
+        # ids of the projects from the ProjectDependencies section
+        self.dependencies = []
+        # other ProjectSection name -> list of (key, value)
+        self.sections = {}
+
+class Solution:
+    """Content of a solution file."""
+    def __init__(self):
+        # Project entries in file order
+        self.projects = []
+        # SolutionConfigurationPlatforms: list of "Release|Win32"
+        self.configurations = []
+        # ProjectConfigurationPlatforms:
+        # project id -> solution configuration -> {"ActiveCfg": "Release|Win32", "Build.0": ...}
+        self.projectConfigurations = {}
+        # NestedProjects: child id -> parent (folder) id
+        self.nested = {}
+        # other GlobalSection name -> list of (key, value)
+        self.sections = {}
+        # md5 of the file
+        self.digest = ""
+
+    def vcprojects(self):
+        """Return the Visual C++ project entries."""
+        return [proj for proj in self.projects if proj.type == PROJECT_VCPROJ]
+
+    def folders(self):
+        """Return the solution folder entries."""
+        return [proj for proj in self.projects if proj.type == PROJECT_FOLDER]
+
+    def platforms(self):
+        """Return the (configuration, platform) pairs of the solution."""
+        return [tuple(conf.split("|", 1)) for conf in self.configurations if "|" in conf]
+
+    def activeConfiguration(self, id, configuration):
+        """Return the project configuration ("Release|Win32") built for the
+        solution configuration, or None if the project isn't part of it.
+
+        """
+        return self.projectConfigurations.get(_guid(id), {}).get(configuration, {}).get("ActiveCfg")
+
+    def buildConfiguration(self, id, configuration):
+        """Return the project configuration built for the solution
+        configuration, or None if the project isn't part of it or is
+        unchecked in the Configuration Manager (no Build.0).
+
+        """
+        confs = self.projectConfigurations.get(_guid(id), {}).get(configuration, {})
+        if "Build.0" not in confs:
+            return None
+        return confs.get("ActiveCfg")
+
+def _guid(text):
+    # the case of the GUIDs varies between the tools which wrote the file
+    return text.strip().strip("{}").upper()
+
+def _keyValue(line):
+    key, sep, value = line.partition("=")
+    return key.strip(), value.strip()
+
+class _Reader:
+    def __init__(self):
+        self.solution = Solution()
+        self.proj = None
+        self.section = None
+        self.items = None
+
+    def line(self, line):
+        # Visual Studio writes the solution in UTF-8 with a BOM, older
+        # files may still be in the ANSI code page
+        if line.startswith(codecs.BOM_UTF8):
+            line = line[len(codecs.BOM_UTF8):]
+        try:
+            line = line.decode("utf-8")
+        except UnicodeDecodeError:
+            line = line.decode("latin-1")
+        line = line.strip()
+        if not line:
+            return
+        keyword = line.split("(", 1)[0].split(None, 1)[0]
+        handler = self._keywords.get(keyword)
+        if handler:
+            handler(self, line)
+        elif self.items is not None:
+            self.items.append(_keyValue(line))
+
+    def project(self, line):
+        # Project("{type}") = "name", "path", "{id}"
+        parts = line.split('"')
+        if len(parts) < 8:
+            return
+        self.proj = SolutionProject(_guid(parts[1]), parts[3], parts[5], _guid(parts[7]))
+        self.solution.projects.append(self.proj)
+
+    def projectSection(self, line):
+        self.section = line.split("(", 1)[1].split(")", 1)[0]
+        self.items = []
+
+    def endProjectSection(self, line):
+        if self.proj is not None and self.items is not None:
+            if self.section == "ProjectDependencies":
+                self.proj.dependencies.extend([_guid(key) for key, value in self.items])
+            else:
+                self.proj.sections[self.section] = self.items
+        self.section = self.items = None
+
+    def endProject(self, line):
+        self.proj = None
+
+    def globalSection(self, line):
+        self.section = line.split("(", 1)[1].split(")", 1)[0]
+        self.items = []
+
+    def endGlobalSection(self, line):
+        solution = self.solution
+        if self.items is None:
+            return
+        if self.section == "SolutionConfigurationPlatforms":
+            solution.configurations.extend([key for key, value in self.items])
+        elif self.section == "ProjectConfigurationPlatforms":
+            # {id}.Release|Win32.ActiveCfg = Release|Win32
+            for key, value in self.items:
+                id, sep, rest = key.partition(".")
+                conf, sep, what = rest.rpartition("|")
+                platform, sep, what = what.partition(".")
+                confs = solution.projectConfigurations.setdefault(_guid(id), {})
+                confs.setdefault(conf + "|" + platform, {})[what] = value
+        elif self.section == "NestedProjects":
+            for key, value in self.items:
+                solution.nested[_guid(key)] = _guid(value)
+        else:
+            solution.sections[self.section] = self.items
+        self.section = self.items = None
+
+    def ignore(self, line):
+        pass
+
+    _keywords = {
+        "Project": project,
+        "ProjectSection": projectSection,
+        "EndProjectSection": endProjectSection,
+        "EndProject": endProject,
+        "Global": ignore,
+        "GlobalSection": globalSection,
+        "EndGlobalSection": endGlobalSection,
+        "EndGlobal": ignore,
+    }
+
+def parse(fileName, usemmap=False):
+    """Parse the solution file and return a Solution.
+
+    Keyword arguments:
+    usemmap -- map the file in memory instead of reading it (very large
+               solutions)
+    """
+    reader = _Reader()
+    md5 = hashlib.md5()
+    file = open(fileName, "rb")
+    try:
+        if usemmap:
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            lines = iter(data.readline, "")
+        else:
+            data = None
+            lines = file
+        for line in lines:
+            md5.update(line)
+            reader.line(line)
+        if data is not None:
+            data.close()
+    finally:
+        file.close()
+    reader.solution.digest = md5.hexdigest()
+    return reader.solution
+
+def _test():
+    import os
+    import tempfile
+    content = """\
+Microsoft Visual Studio Solution File, Format Version 9.00
+# Visual Studio 2005
+Project("{8BC9CEB8-8B4A-11D0-8D11-00A0C91BC942}") = "App", "App\\App.vcproj", "{11111111-0000-0000-0000-000000000000}"
+\tProjectSection(ProjectDependencies) = postProject
+\t\t{2222222A-0000-0000-0000-000000000000} = {2222222A-0000-0000-0000-000000000000}
+\tEndProjectSection
+EndProject
+Project("{8BC9CEB8-8B4A-11D0-8D11-00A0C91BC942}") = "Lib\xc3\xa9", "Lib\xc3\xa9\\Lib.vcproj", "{2222222A-0000-0000-0000-000000000000}"
+EndProject
+Project("{2150E333-8FDC-42A3-9474-1A3956D46DE8}") = "Libraries", "Libraries", "{33333333-0000-0000-0000-000000000000}"
+\tProjectSection(SolutionItems) = preProject
+\t\treadme.txt = readme.txt
+\tEndProjectSection
+EndProject
+Global
+\tGlobalSection(SolutionConfigurationPlatforms) = preSolution
+\t\tDebug|Win32 = Debug|Win32
+\t\tRelease|x64 = Release|x64
+\tEndGlobalSection
+\tGlobalSection(ProjectConfigurationPlatforms) = postSolution
+\t\t{11111111-0000-0000-0000-000000000000}.Debug|Win32.ActiveCfg = Debug|Win32
+\t\t{11111111-0000-0000-0000-000000000000}.Debug|Win32.Build.0 = Debug|Win32
+\t\t{11111111-0000-0000-0000-000000000000}.Release|x64.ActiveCfg = Release Static|x64
+\t\t{2222222a-0000-0000-0000-000000000000}.Debug|Win32.ActiveCfg = Debug|Win32
+\tEndGlobalSection
+\tGlobalSection(NestedProjects) = preSolution
+\t\t{2222222a-0000-0000-0000-000000000000} = {33333333-0000-0000-0000-000000000000}
+\tEndGlobalSection
+\tGlobalSection(SolutionProperties) = preSolution
+\t\tHideSolutionNode = FALSE
+\tEndGlobalSection
+EndGlobal
+"""
+    fd, fileName = tempfile.mkstemp(suffix=".sln")
+    try:
+        os.write(fd, codecs.BOM_UTF8 + content)
+        os.close(fd)
+        for usemmap in (False, True):
+            sln = parse(fileName, usemmap)
+            assert sln.digest == hashlib.md5(codecs.BOM_UTF8 + content).hexdigest()
+            assert [proj.name for proj in sln.vcprojects()] == [u"App", u"Lib\xe9"]
+            assert [proj.name for proj in sln.folders()] == ["Libraries"]
+            app, lib, folder = sln.projects
+            assert lib.path == u"Lib\xe9\\Lib.vcproj" and isinstance(lib.path, unicode)
+            assert app.path == "App\\App.vcproj" and app.id == "11111111-0000-0000-0000-000000000000"
+            assert app.dependencies == ["2222222A-0000-0000-0000-000000000000"]
+            assert folder.sections == {"SolutionItems": [("readme.txt", "readme.txt")]}
+            assert sln.configurations == ["Debug|Win32", "Release|x64"]
+            assert sln.platforms() == [("Debug", "Win32"), ("Release", "x64")]
+            assert sln.projectConfigurations[app.id]["Debug|Win32"] == {"ActiveCfg": "Debug|Win32", "Build.0": "Debug|Win32"}
+            assert sln.activeConfiguration(app.id, "Release|x64") == "Release Static|x64"
+            assert sln.activeConfiguration(lib.id, "Release|x64") is None
+            assert sln.activeConfiguration(lib.id.lower(), "Debug|Win32") == "Debug|Win32"
+            assert sln.buildConfiguration(app.id, "Debug|Win32") == "Debug|Win32"
+            assert sln.buildConfiguration(app.id, "Release|x64") is None
+            assert sln.buildConfiguration(lib.id, "Debug|Win32") is None
+            assert sln.nested == {lib.id: folder.id}
+            assert sln.sections == {"SolutionProperties": [("HideSolutionNode", "FALSE")]}
+    finally:
+        os.remove(fileName)
+
+if __name__=='__main__':
+    _test()
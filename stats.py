@@ -0,0 +1,117 @@
+#
+# stats.py
+#
+# Timings and counters of a conversion
+#
+
+import json
+import os
+import string
+import time
+
+def _cpu():
+    times = os.times()
+    return times[0] + times[1]
+
+class Stats:
+    """Wall and CPU time of the phases of a conversion, time spent on each
+    project and counters (bytes parsed, directories listed, cache hits...).
+
+    Pass an instance to Sln2SCons to fill it, then use report(), save()
+    or summary().
+    """
+    def __init__(self):
+        # phases in the order they started
+        self.order = []
+        # phase -> [wall, cpu] seconds
+        self.phases = {}
+        # project -> {phase: seconds}
+        self.projects = {}
+        # name -> value
+        self.counters = {}
+        self._started = {}
+
+    def begin(self, phase):
+        if phase not in self.phases:
+            self.order.append(phase)
+            self.phases[phase] = [0.0, 0.0]
+        self._started[phase] = (time.time(), _cpu())
+
+    def end(self, phase):
+        wall, cpu = self._started.pop(phase)
+        times = self.phases[phase]
+        times[0] += time.time() - wall
+        times[1] += _cpu() - cpu
+
+    def project(self, name, phase, seconds):
+        times = self.projects.setdefault(name, {})
+        times[phase] = times.get(phase, 0.0) + seconds
+
+    def count(self, name, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def report(self):
+        """Return the statistics as a dictionary (the JSON report)."""
+        return {"phases": [{"name": phase, "wall": self.phases[phase][0], "cpu": self.phases[phase][1]}
+                           for phase in self.order],
+                "projects": self.projects,
+                "counters": self.counters}
+
+    def save(self, fileName):
+        """Write the JSON report."""
+        file = open(fileName, "w")
+        try:
+            json.dump(self.report(), file, indent=1, sort_keys=True)
+        finally:
+            file.close()
+
+    def summary(self, top=10):
+        """Return a readable summary with the 'top' slowest projects."""
+        lines = ["%-20s %10s %10s" % ("phase", "wall", "cpu")]
+        total = [0.0, 0.0]
+        for phase in self.order:
+            wall, cpu = self.phases[phase]
+            total[0] += wall
+            total[1] += cpu
+            lines.append("%-20s %10.3f %10.3f" % (phase, wall, cpu))
+        lines.append("%-20s %10.3f %10.3f" % ("total", total[0], total[1]))
+        if self.projects:
+            lines.append("")
+            lines.append("slowest projects:")
+            slowest = sorted([(sum(times.values()), name) for name, times in self.projects.items()])
+            slowest.reverse()
+            for seconds, name in slowest[:top]:
+                detail = string.join(["%s %.3f" % item for item in sorted(self.projects[name].items())], ", ")
+                lines.append("  %-30s %8.3f  (%s)" % (name, seconds, detail))
+        if self.counters:
+            lines.append("")
+            lines.append("counters:")
+            for name in sorted(self.counters):
+                lines.append("  %-30s %10s" % (name, self.counters[name]))
+            for name, hits, misses in _ratios(self.counters):
+                lines.append("  %-30s %9.1f%%" % (name + " hit rate", 100.0 * hits / (hits + misses)))
+        return string.join(lines, "\n") + "\n"
+
+def _ratios(counters):
+    """Return (cache, hits, misses) for the "<cache> hits" counters."""
+    ret = []
+    for name in sorted(counters):
+        if name.endswith(" hits"):
+            cache = name[:-len(" hits")]
+            hits = counters[name]
+            misses = counters.get(cache + " misses", 0)
+            if hits + misses:
+                ret.append((cache, hits, misses))
+    return ret
+
+def profile(fileName, function, *args, **kwargs):
+    """Call the function under cProfile and dump the profile to fileName
+    (read it with the pstats module). Return the result of the function.
+
+    """
+    import cProfile
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(function, *args, **kwargs)
+    finally:
+        profiler.dump_stats(fileName)
@@ -0,0 +1,278 @@
+#
+# templates.py
+#
+# Templates of the generated SConscript and SConstruct files
+#
+
+from string import Template
+
+SCONSCRIPT_HEADER = """\
+# sln2scons.py autogenerated SConscript
+Import('env')
+"""
+
+# header of a project in the single SConstruct
+SCONSTRUCT_PROJECT = Template("""\
+# ${name} (${dir})
+""")
+
+SCONSTRUCT_VARIANTDIR = Template("""\
+VariantDir('#${builddir}', '#${dir}', duplicate=0)
+""")
+
+SCONSCRIPT_CLONE = """\
+e = env.Clone()
+"""
+
+SCONSCRIPT_LIBS = Template("""\
+e['LIBS'] = [${libs}]
+""")
+
+SCONSCRIPT_PLATFORM = """\
+if not e['MYPLATFORM'] == 'winnt':
+    e.Append(LIBS='m')
+"""
+
+SCONSCRIPT_LIBPATH = Template("""\
+e['LIBPATH'] = [${libpaths}]
+""")
+
+SCONSCRIPT_CPPPATH = Template("""\
+e['CPPPATH'] = [${incdirs}]
+""")
+
+# builder per ConfigurationType: 1 executable, 2 shared library, 4 static library
+BUILDERS = {"1": "Program", "2": "SharedLibrary", "4": "StaticLibrary"}
+
+# ${prefix} is the directory of the project in the single SConstruct, the
+# paths of the SConscripts are relative to their own directory
+SCONSCRIPT_TARGET = Template("""\
+${name} = e.${builder}('${prefix}${name}', [${sources}])
+""")
+
+# the header is compiled once and included first in the sources using it,
+# -Winvalid-pch reports a .gch which can't be used (flags changed...)
+SCONSCRIPT_PCH = Template("""\
+# precompiled header ${through}
+pch${index} = e.Command('${gch}', '${header}', '${command}')
+pchflags${index} = ['-Winvalid-pch', '-include', pch${index}[0].abspath[:-len('.gch')]]
+pchobjects${index} = [e.${object}(source, CCFLAGS=e['CCFLAGS'] + pchflags${index}) for source in [${sources}]]
+e.Depends(pchobjects${index}, pch${index})
+""")
+
+# command compiling a header, per (language, shared library)
+PCH_COMMANDS = {
+    ("c++", False): "$CXX -o $TARGET -x c++-header -c $CXXFLAGS $CCFLAGS $_CCCOMCOM $SOURCE",
+    ("c++", True): "$SHCXX -o $TARGET -x c++-header -c $SHCXXFLAGS $SHCCFLAGS $_CCCOMCOM $SOURCE",
+    ("c", False): "$CC -o $TARGET -x c-header -c $CFLAGS $CCFLAGS $_CCCOMCOM $SOURCE",
+    ("c", True): "$SHCC -o $TARGET -x c-header -c $SHCFLAGS $SHCCFLAGS $_CCCOMCOM $SOURCE",
+}
+
+SCONSCRIPT_FOOTER = Template("""\
+e.Default(${name})
+e.Install(Dir('#/' + e['MYPLATFORM'] + '/lib/${outdir}'), ${name})
+
+if 'distclean' in COMMAND_LINE_TARGETS:
+    Execute(Delete('${prefix}${name}'))
+    Execute(Delete(Dir('#/' + e['MYPLATFORM'] + '/bin/${outdir}').abspath + '/' + str(${name}[0])))
+    Execute(Delete(Glob('${prefix}*.o')))
+    Execute(Delete(Glob('${prefix}*.so')))
+    Execute(Delete(Glob('${prefix}*.os')))
+    Execute(Delete(Glob('${prefix}*.a')))
+    Execute(Delete(Glob('${prefix}*.la')))
+    Execute(Delete(Glob('${prefix}*.dylib')))
+
+if 'pack' in COMMAND_LINE_TARGETS:
+    Execute(Copy(Dir('#/' + e['MYPLATFORM'] + '/bin/${outdir}'), ${name}[0]))
+    e.Alias('pack', Dir('#/' + e['MYPLATFORM'] + '/bin/${outdir}'))
+
+""")
+
+SCONSCRIPT_INCLUDES = Template("""\
+e.IncludeDependencies(${name}, '${database}')
+""")
+
+# the target is returned to the SConstruct for the dependencies between projects
+SCONSCRIPT_RETURN = Template("""\
+Return('${name}')
+""")
+
+SCONSTRUCT_TARGETS = """\
+targets = {}
+"""
+
+SCONSTRUCT_SCONSCRIPT = Template("""\
+targets['${name}'] = env.SConscript('${script}'${args})
+""")
+
+# after the project in the single SConstruct
+SCONSTRUCT_TARGET = Template("""\
+targets['${name}'] = ${name}
+""")
+
+SCONSTRUCT_DEPENDS = Template("""\
+env.Depends(targets['${name}'], [${deps}])
+""")
+
+SCONSTRUCT_HEADER = """\
+# sln2scons.py autogenerated SConstruct
+import sys
+
+if ARGUMENTS.get('debug', 0):
+    env = Environment(CCFLAGS = '-g')
+else:
+    env = Environment()
+plat = sys.platform
+if plat.find('linux') != -1:
+    env['MYPLATFORM']='linux'
+elif (plat.find('darwin') != -1) or (plat.find('mac') != -1):
+    env['MYPLATFORM']='macos'
+elif plat.find('win') != -1:
+    env['MYPLATFORM']='winnt'
+else:
+    env['MYPLATFORM']=plat
+env['CPPDEFINES'] = [('i386', '1'), ('LINUX', '1'), ('HAVE_VISIBILITY_HIDDEN_ATTRIBUTE', '1'), ('HAVE_VISIBILITY_PRAGMA', '1'), ('XP_UNIX', '1'), ('_GNU_SOURCE', '1'), ('HAVE_FCNTL_FILE_LOCKING', '1'), ('HAVE_LCHOWN', '1'), ('HAVE_STRERROR', '1'), ('_REENTRANT', '1'), ('HAVE_EXPAT_CONFIG_H', '1'), ('USE_APR_UTIL','1')]
+"""
+
+SCONSTRUCT_TUNING = """\
+# check timestamps first and contents only of the changed files, cache the
+# implicit dependencies and keep every signature in one database
+env.Decider('MD5-timestamp')
+SetOption('implicit_cache', 1)
+SConsignFile()
+if GetOption('num_jobs') == 1:
+    try:
+        import multiprocessing
+        SetOption('num_jobs', multiprocessing.cpu_count())
+    except (ImportError, NotImplementedError):
+        pass
+"""
+
+# the headers of the objects are taken from the databases written by
+# sln2scons.py instead of being scanned, unless the source or one of its
+# headers changed since
+SCONSTRUCT_INCLUDES = """\
+def IncludeDependencies(env, target, database):
+    import json
+    import os
+    # the paths of the database are relative to its directory
+    fileName = env.File(database).srcnode().abspath
+    base = os.path.dirname(fileName)
+    try:
+        data = json.load(open(fileName))
+    except (IOError, ValueError):
+        return
+    newer = {}
+    def changed(fileName):
+        if fileName not in newer:
+            try:
+                newer[fileName] = os.path.getmtime(os.path.join(base, fileName)) > data['time']
+            except OSError:
+                newer[fileName] = True
+        return newer[fileName]
+    for node in target:
+        for obj in node.sources:
+            if not obj.sources or obj.implicit is not None:
+                continue
+            source = os.path.relpath(obj.sources[0].srcnode().abspath, base).replace('\\\\', '/')
+            headers = data['headers'].get(source)
+            if headers is None or (source not in data['generated'] and changed(source)) or \\
+               [header for header in headers if changed(header)]:
+                continue
+            obj.implicit = []
+            obj.implicit_set = set()
+            obj._add_child(obj.implicit, obj.implicit_set,
+                           [env.File(os.path.normpath(os.path.join(base, header))) for header in headers])
+env.AddMethod(IncludeDependencies)
+"""
+
+SCONSTRUCT_CACHEDIR = Template("""\
+CacheDir(ARGUMENTS.get('cachedir', '${cachedir}'))
+""")
+
+SCONSTRUCT_VARIANT = Template("""\
+variant = ARGUMENTS.get('variant', '${default}')
+if variant not in [${names}]:
+    sys.stderr.write('Unknown variant: ' + variant + '\\n')
+    Exit(1)
+""")
+
+SCONSTRUCT_DIRS = Template("""\
+Execute(Mkdir(Dir('#' + env['MYPLATFORM'] + '/bin${outdir})))
+Execute(Mkdir(Dir('#' + env['MYPLATFORM'] + '/lib${outdir})))
+Export('env')
+
+""")
+
+def quoted(items, suffix=""):
+    """Return the items as a list of quoted python strings ("'a', 'b'")."""
+    return ", ".join(["'" + item + suffix + "'" for item in items])
+
+class _Node(object):
+    """Stand-in for the SCons file nodes IncludeDependencies uses."""
+    def __init__(self, abspath, sources=()):
+        self.abspath = abspath
+        self.sources = list(sources)
+        self.implicit = None
+
+    def srcnode(self):
+        return self
+
+    def _add_child(self, collection, set, children):
+        collection.extend(children)
+        set.update(children)
+
+class _Environment(object):
+    def __init__(self, top, dir):
+        self.top = top
+        # directory of the SConscript being read
+        self.dir = dir
+
+    def File(self, name):
+        import os
+        if name.startswith("#"):
+            return _Node(os.path.join(self.top, name[1:]))
+        return _Node(os.path.join(self.top, self.dir, name))
+
+    def AddMethod(self, function):
+        self.IncludeDependencies = function
+
+def _test():
+    import json
+    import os
+    import shutil
+    import tempfile
+    top = tempfile.mkdtemp()
+    try:
+        os.makedirs(os.path.join(top, "src"))
+        os.makedirs(os.path.join(top, "inc"))
+        names = ("src/a.cpp", "src/b.cpp", "src/a.h", "inc/b.h")
+        for name in names:
+            open(os.path.join(top, name), "w").close()
+        time = max([os.path.getmtime(os.path.join(top, name)) for name in names])
+        database = open(os.path.join(top, "src", "SConscript.includes.json"), "w")
+        json.dump({"time": time, "headers": {"a.cpp": ["a.h"], "b.cpp": ["../inc/b.h", "a.h"]}, "generated": []},
+                  database)
+        database.close()
+        def objects(database):
+            env = _Environment(top, "src")
+            exec SCONSTRUCT_INCLUDES in {"env": env}
+            objects = [_Node(os.path.join(top, "src", name[0] + ".o"), [_Node(os.path.join(top, "src", name))])
+                       for name in ("a.cpp", "b.cpp", "c.cpp")]
+            env.IncludeDependencies(env, [_Node(os.path.join(top, "src", "lib.a"), objects)], database)
+            return [obj.implicit and [os.path.relpath(header.abspath, top) for header in obj.implicit]
+                    for obj in objects]
+        # the headers are declared, c.cpp isn't in the database; the path
+        # of the database is relative to the SConscript or to the top
+        assert objects("SConscript.includes.json") == [["src/a.h"], ["inc/b.h", "src/a.h"], None]
+        assert objects("#src/SConscript.includes.json") == [["src/a.h"], ["inc/b.h", "src/a.h"], None]
+        # a changed header: the sources including it are scanned by SCons
+        os.utime(os.path.join(top, "inc/b.h"), (time + 10, time + 10))
+        assert objects("SConscript.includes.json") == [["src/a.h"], None, None]
+        os.utime(os.path.join(top, "src/a.cpp"), (time + 10, time + 10))
+        assert objects("SConscript.includes.json") == [None, None, None]
+    finally:
+        shutil.rmtree(top)
+
+if __name__=='__main__':
+    _test()
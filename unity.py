@@ -0,0 +1,59 @@
+#
+# unity.py
+#
+# Unity (jumbo) builds: sources compiled together through a generated
+# file including them
+#
+
+import hashlib
+import string
+
+def batches(sources, size):
+    """Split the sources in batches of about 'size' files.
+
+    The sources are sorted and a batch ends after a source whose name
+    hashes to a multiple of 'size' (or when it reaches twice the size), so
+    adding or removing a source only changes its own batch. The case of
+    the names doesn't matter, as in the project files.
+    """
+    ret = []
+    batch = []
+    for source in sorted(sources, key=string.lower):
+        batch.append(source)
+        key = source.lower().encode("utf-8")
+        if len(batch) >= 2 * size or int(hashlib.md5(key).hexdigest()[:8], 16) % size == 0:
+            ret.append(batch)
+            batch = []
+    if batch:
+        ret.append(batch)
+    return ret
+
+def content(name, sources):
+    """Return the file compiling the sources (paths relative to the file)."""
+    lines = ["// sln2scons.py autogenerated unity build of " + name + "\n"]
+    lines.extend(["#include \"" + source + "\"\n" for source in sources])
+    return string.join(lines, "")
+
+def _test():
+    sources = ["src/File%d.cpp" % i for i in range(200)]
+    old = batches(sources, 8)
+    assert sorted([source for batch in old for source in batch]) == sorted(sources)
+    assert max([len(batch) for batch in old]) <= 16
+    # the order and the case of the names don't matter
+    assert batches(list(reversed(sources)), 8) == old
+    assert [[source.lower() for source in batch] for batch in batches([source.upper() for source in sources], 8)] == \
+           [[source.lower() for source in batch] for batch in old]
+    # an added source changes its own batch, split in two at worst
+    for i in range(50):
+        added = "src/Added%d.cpp" % i
+        new = batches(sources + [added], 8)
+        changed = [batch for batch in new if batch not in old]
+        assert len(changed) <= 2 and [batch for batch in changed if added in batch], (added, changed)
+    # a removed source too
+    new = batches(sources[1:], 8)
+    assert len([batch for batch in new if batch not in old]) <= 1
+    assert content("Test", ["a.cpp", "sub/b.cpp"]) == \
+           '// sln2scons.py autogenerated unity build of Test\n#include "a.cpp"\n#include "sub/b.cpp"\n'
+
+if __name__=='__main__':
+    _test()
@@ -0,0 +1,202 @@
+#
+# vcproj.py
+#
+# Single pass reader of Visual Studio 2005 project files (.vcproj)
+#
+# The project file is streamed through expat and only what the SCons
+# generator needs is kept: the configurations with their tools attributes
+# and the list of files (with their per file configurations). No DOM is
+# ever built.
+#
+
+import hashlib
+from xml.parsers import expat
+
+class Configuration(object):
+    """A project (<Configuration>) or file (<FileConfiguration>) configuration."""
+    __slots__ = ('name', 'attrs', 'tools')
+
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+        # tool name -> attributes
+        self.tools = {}
+
+    def get(self, attr, default=u""):
+        return self.attrs.get(attr, default)
+
+    def tool(self, name):
+        """Return the attributes of the given tool (empty if not present)."""
+        return self.tools.get(name, _empty)
+
+class File(object):
+    """A <File> entry of the project."""
+    __slots__ = ('path', 'configurations')
+
+    def __init__(self, path):
+        self.path = path
+        # FileConfiguration name -> Configuration
+        self.configurations = {}
+
+class VCProject(object):
+    """Compact model of a .vcproj file."""
+    __slots__ = ('name', 'id', 'configurations', 'files', 'size', 'digest')
+
+    def __init__(self):
+        self.name = u""
+        self.id = u""
+        # Configuration list in file order
+        self.configurations = []
+        # File list in file order
+        self.files = []
+        # bytes parsed and md5 of the content
+        self.size = 0
+        self.digest = ""
+
+    def configuration(self, name):
+        """Return the configuration with the given name ("Release|Win32")
+        or None.
+
+        """
+        for conf in self.configurations:
+            if conf.name == name:
+                return conf
+        return None
+
+_empty = {}
+
+class _Reader:
+    def __init__(self):
+        self.project = VCProject()
+        self.conf = None
+        self.files = []
+        self.infiles = 0
+
+    def start(self, tag, attrs):
+        if tag == "Tool":
+            if self.conf is not None:
+                self.conf.tools[attrs.get("Name", u"")] = attrs
+        elif tag == "Configuration":
+            if not self.infiles:
+                self.conf = Configuration(attrs.get("Name", u""), attrs)
+                self.project.configurations.append(self.conf)
+        elif tag == "File":
+            fi = File(attrs.get("RelativePath", u""))
+            self.project.files.append(fi)
+            self.files.append(fi)
+        elif tag == "FileConfiguration":
+            if self.files:
+                self.conf = Configuration(attrs.get("Name", u""), attrs)
+                self.files[-1].configurations[self.conf.name] = self.conf
+        elif tag == "Files":
+            self.infiles += 1
+        elif tag == "VisualStudioProject":
+            self.project.name = attrs.get("Name", u"")
+            self.project.id = attrs.get("ProjectGUID", u"").strip("{}")
+
+    def end(self, tag):
+        if tag == "Configuration" or tag == "FileConfiguration":
+            self.conf = None
+        elif tag == "File":
+            self.files.pop()
+        elif tag == "Files":
+            self.infiles -= 1
+
+def _parser(reader):
+    parser = expat.ParserCreate()
+    parser.StartElementHandler = reader.start
+    parser.EndElementHandler = reader.end
+    return parser
+
+def parse(fileName, bufsize=65536):
+    """Parse the project file and return a VCProject. In case of error
+    return None.
+
+    """
+    try:
+        file = open(fileName, 'rb')
+    except IOError:
+        return None
+    reader = _Reader()
+    parser = _parser(reader)
+    md5 = hashlib.md5()
+    try:
+        try:
+            while True:
+                data = file.read(bufsize)
+                reader.project.size += len(data)
+                md5.update(data)
+                parser.Parse(data, not data)
+                if not data:
+                    break
+        except expat.ExpatError, e:
+            print "WARNING!!! File: " + fileName + " can't be parsed (" + str(e) + ")"
+            return None
+    finally:
+        file.close()
+    reader.project.digest = md5.hexdigest()
+    return reader.project
+
+def parseString(content, fileName=""):
+    """Parse the content of a project file and return a VCProject. In case
+    of error return None.
+
+    """
+    reader = _Reader()
+    try:
+        _parser(reader).Parse(content, True)
+    except expat.ExpatError, e:
+        print "WARNING!!! File: " + fileName + " can't be parsed (" + str(e) + ")"
+        return None
+    reader.project.size = len(content)
+    reader.project.digest = hashlib.md5(content).hexdigest()
+    return reader.project
+
+def _test():
+    content = """<?xml version="1.0" encoding="Windows-1252"?>
+<VisualStudioProject ProjectType="Visual C++" Name="Sample" ProjectGUID="{12345678-0000-0000-0000-000000000000}">
+  <Configurations>
+    <Configuration Name="Debug|Win32" ConfigurationType="1">
+      <Tool Name="VCCLCompilerTool" AdditionalIncludeDirectories="..\\inc"/>
+      <Tool Name="VCLinkerTool" OutputFile="$(OutDir)\\sample.exe"/>
+    </Configuration>
+    <Configuration Name="Release|Win32" ConfigurationType="1"/>
+  </Configurations>
+  <Files>
+    <Filter Name="Source Files">
+      <File RelativePath=".\\main.cpp">
+        <FileConfiguration Name="Debug|Win32">
+          <Tool Name="VCCLCompilerTool" UsePrecompiledHeader="1"/>
+        </FileConfiguration>
+      </File>
+      <Filter Name="Nested">
+        <File RelativePath=".\\nested\\a.cpp">
+          <File RelativePath=".\\nested\\a.inl"/>
+        </File>
+      </Filter>
+    </Filter>
+    <File RelativePath=".\\readme.txt"/>
+  </Files>
+</VisualStudioProject>
+"""
+    project = parseString(content, "sample.vcproj")
+    assert project.name == "Sample" and project.id == "12345678-0000-0000-0000-000000000000"
+    assert project.size == len(content) and project.digest == hashlib.md5(content).hexdigest()
+    assert [conf.name for conf in project.configurations] == ["Debug|Win32", "Release|Win32"]
+    debug = project.configuration("Debug|Win32")
+    assert debug.get("ConfigurationType") == "1"
+    assert debug.tool("VCCLCompilerTool").get("AdditionalIncludeDirectories") == "..\\inc"
+    assert debug.tool("VCLinkerTool").get("OutputFile") == "$(OutDir)\\sample.exe"
+    assert project.configuration("Release|Win32").tool("VCLinkerTool") == {}
+    assert project.configuration("Release|x64") is None
+    # the files of the filters and of the nested File entries, in file order
+    assert [fi.path for fi in project.files] == [".\\main.cpp", ".\\nested\\a.cpp", ".\\nested\\a.inl", ".\\readme.txt"]
+    # the FileConfiguration belongs to its file, not to the project
+    main = project.files[0]
+    assert main.configurations["Debug|Win32"].tool("VCCLCompilerTool").get("UsePrecompiledHeader") == "1"
+    assert "UsePrecompiledHeader" not in debug.tool("VCCLCompilerTool")
+    assert [fi.configurations for fi in project.files[1:]] == [{}, {}, {}]
+    assert parseString("<VisualStudioProject>", "broken.vcproj") is None
+
+if __name__=='__main__':
+    _test()